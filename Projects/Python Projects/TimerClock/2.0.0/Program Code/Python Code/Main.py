@@ -1,30 +1,99 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
+import sys
 import time
 from datetime import datetime, timedelta
 import json
 import os
-import pytz
-import calendar
+import shlex
+import itertools
+import bisect
+import heapq
+import random
+from array import array
+from collections import namedtuple, OrderedDict
+
+import tz_service
+
+# calendar和numpy只在部分窗口中使用, 第一次用到时才导入, 以缩短启动时间
+_numpy = None  # 已导入的numpy; False表示未安装
+
+def optional_numpy():
+    """第一次调用时导入numpy(可选依赖, 用于年视图的批量统计), 未安装时返回None"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+# 实体ID生成器, 用于在运行期间唯一标识倒计时器、闹钟等对象
+_entity_ids = itertools.count(1)
 
 class CountdownTimer:
-    """倒计时器对象"""
+    """倒计时器对象
+
+    运行时用time.monotonic_ns()记录截止时刻; 暂停时保存剩余的纳秒数,
+    继续时按剩余时间重新计算截止时刻。end_time只用于保存和显示。
+    状态: running为计时中, paused为已暂停, 两者都为False表示已结束。
+    """
     def __init__(self, name, minutes, seconds):
+        self.uid = next(_entity_ids)
         self.name = name
         self.total_seconds = minutes * 60 + seconds
+        self.remaining_ns = self.total_seconds * 1_000_000_000
+        self.deadline_ns = time.monotonic_ns() + self.remaining_ns
         self.end_time = datetime.now() + timedelta(seconds=self.total_seconds)
         self.running = True
+        self.paused = False
+
+    def remaining(self, now_ns=None):
+        """返回剩余的纳秒数, 不小于0"""
+        if not self.running:
+            return self.remaining_ns
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        return max(0, self.deadline_ns - now_ns)
 
     def remaining_time(self):
-        return self.end_time - datetime.now()
+        return timedelta(microseconds=self.remaining() // 1000)
+
+    def pause(self):
+        if self.running:
+            self.remaining_ns = self.remaining()
+            self.running = False
+            self.paused = True
+
+    def resume(self):
+        """继续计时; 已结束的倒计时从头开始"""
+        if self.running:
+            return
+        if not self.paused or self.remaining_ns <= 0:
+            self.remaining_ns = self.total_seconds * 1_000_000_000
+        self.deadline_ns = time.monotonic_ns() + self.remaining_ns
+        self.end_time = datetime.now() + timedelta(microseconds=self.remaining_ns // 1000)
+        self.running = True
+        self.paused = False
+
+    def finish(self):
+        self.running = False
+        self.paused = False
+        self.remaining_ns = 0
 
     def to_dict(self):
+        remaining_ns = self.remaining()
+        if self.running:
+            self.end_time = datetime.now() + timedelta(microseconds=remaining_ns // 1000)
         return {
             "type": "timer",
             "name": self.name,
             "total_seconds": self.total_seconds,
             "end_time": self.end_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "running": self.running
+            "running": self.running,
+            "paused": self.paused,
+            "remaining_ns": remaining_ns
         }
 
     @staticmethod
@@ -33,45 +102,86 @@ class CountdownTimer:
         timer.total_seconds = data["total_seconds"]
         timer.end_time = datetime.strptime(data["end_time"], "%Y-%m-%d %H:%M:%S")
         timer.running = data["running"]
+        timer.paused = data.get("paused", False)
+        if timer.running:
+            # 单调时钟不能跨进程使用, 按保存的结束时间重新计算截止时刻
+            remaining = (timer.end_time - datetime.now()).total_seconds()
+            timer.remaining_ns = max(0, int(remaining * 1_000_000_000))
+            timer.deadline_ns = time.monotonic_ns() + timer.remaining_ns
+        elif timer.paused:
+            timer.remaining_ns = data.get("remaining_ns", timer.total_seconds * 1_000_000_000)
+        else:
+            timer.remaining_ns = 0
         return timer
 
+_unknown_zones = set()  # 已提示过的无效时区
+
+def wall_to_utc(moment, tz=None):
+    """把时区tz(None为本机时区)的当地时间转换为UTC时间戳(整数秒)
+
+    夏令时空档中的时间向后顺延空档的长度, 重复出现的时间取第一次(fold=0)。
+    本机时区由datetime.timestamp()按同样的规则换算。
+    """
+    if moment is None:
+        return None
+    if tz is not None:
+        try:
+            return tz_service.get_zone(tz).localize(moment)
+        except tz_service.UnknownTimeZoneError:
+            if tz not in _unknown_zones:
+                _unknown_zones.add(tz)
+                print(f"未知时区 {tz}, 按本机时区计算")
+    return int(moment.timestamp())
+
+def utc_to_wall(ts, tz=None):
+    """UTC时间戳在时区tz(None为本机时区)的当地时间"""
+    if tz is not None:
+        try:
+            return tz_service.get_zone(tz).to_local(ts)
+        except tz_service.UnknownTimeZoneError:
+            pass
+    return datetime.fromtimestamp(ts)
+
 class Alarm:
-    """闹钟对象"""
-    def __init__(self, name, hour, minute, repeat="once"):
+    """闹钟对象
+
+    tz为闹钟所在的时区名, None表示本机时区。alarm_time为下次响铃的当地时间, 用于显示;
+    fire_at为对应的UTC时间戳(整数秒), 判断是否响铃时只比较fire_at。
+    """
+    def __init__(self, name, hour, minute, repeat="once", tz=None):
+        self.uid = next(_entity_ids)
         self.name = name
         self.hour = hour
         self.minute = minute
         self.repeat = repeat  # "once", "daily", "weekend"
-        now = datetime.now()
-        self.alarm_time = datetime(now.year, now.month, now.day, hour, minute)
-        
-        # 调整闹钟时间
-        if self.alarm_time < now:
-            self._increment_alarm_time()
-            
+        self.tz = tz
+        self.schedule(int(time.time()))
         self.active = True
 
-    def _increment_alarm_time(self):
-        """根据重复类型增加闹钟时间"""
-        if self.repeat == "once":
-            self.alarm_time += timedelta(days=1)
-        elif self.repeat == "daily":
-            self.alarm_time += timedelta(days=1)
-        elif self.repeat == "weekend":
-            while True:
-                self.alarm_time += timedelta(days=1)
-                # 5是周六，6是周日
-                if self.alarm_time.weekday() in (5, 6):
-                    break
-
-    def check_and_update(self):
+    def schedule(self, after_ts):
+        """把下次响铃设为晚于after_ts(UTC时间戳)的第一个符合重复类型的时刻"""
+        day = utc_to_wall(after_ts, self.tz).date() - timedelta(days=1)
+        while True:
+            # 仅周末: 5是周六，6是周日
+            if self.repeat != "weekend" or day.weekday() in (5, 6):
+                alarm_time = datetime(day.year, day.month, day.day, self.hour, self.minute)
+                fire_at = wall_to_utc(alarm_time, self.tz)
+                if fire_at > after_ts:
+                    self.alarm_time = alarm_time
+                    self.fire_at = fire_at
+                    return
+            day += timedelta(days=1)
+
+    def check_and_update(self, now_ts=None):
         """检查闹钟是否触发并更新下一次时间"""
-        now = datetime.now()
-        if self.active and now >= self.alarm_time:
+        if now_ts is None:
+            now_ts = int(time.time())
+        if self.active and now_ts >= self.fire_at:
             if self.repeat == "once":
                 self.active = False
             else:
-                self._increment_alarm_time()
+                # 错过多次(例如程序休眠)时直接跳到下一个未来的时刻, 只响一次
+                self.schedule(max(self.fire_at, now_ts))
             return True
         return False
 
@@ -83,19 +193,22 @@ class Alarm:
             "minute": self.minute,
             "repeat": self.repeat,
             "alarm_time": self.alarm_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "active": self.active
+            "active": self.active,
+            "tz": self.tz
         }
 
     @staticmethod
     def from_dict(data):
-        alarm = Alarm(data["name"], data["hour"], data["minute"], data["repeat"])
+        alarm = Alarm(data["name"], data["hour"], data["minute"], data["repeat"], data.get("tz"))
         alarm.alarm_time = datetime.strptime(data["alarm_time"], "%Y-%m-%d %H:%M:%S")
+        alarm.fire_at = wall_to_utc(alarm.alarm_time, alarm.tz)
         alarm.active = data["active"]
         return alarm
 
 class Countdown:
     """倒计日对象"""
     def __init__(self, name, target_date):
+        self.uid = next(_entity_ids)
         self.name = name
         self.target_date = target_date
 
@@ -111,37 +224,214 @@ class Countdown:
         target_date = datetime.strptime(data["target_date"], "%Y-%m-%d")
         return Countdown(data["name"], target_date)
 
+def format_stopwatch_time(elapsed_ns):
+    """把纳秒格式化为秒表显示的 分:秒.百分秒"""
+    centiseconds = elapsed_ns // 10_000_000
+    seconds, centis = divmod(centiseconds, 100)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes:02d}:{seconds:02d}.{centis:02d}"
+
+class LapLog:
+    """秒表计次记录
+
+    只保存每次计次时的累计时间(纳秒), 单圈时间由相邻两次相减得到;
+    最快、最慢和总时长在追加时增量维护, 不需要重新扫描。
+    """
+    def __init__(self, splits=()):
+        self.splits = array('q')
+        self.fastest = None
+        self.slowest = None
+        for split in splits:
+            self.append(split)
+
+    def __len__(self):
+        return len(self.splits)
+
+    def append(self, split_ns):
+        lap_ns = split_ns - (self.splits[-1] if self.splits else 0)
+        self.splits.append(split_ns)
+        if self.fastest is None or lap_ns < self.fastest:
+            self.fastest = lap_ns
+        if self.slowest is None or lap_ns > self.slowest:
+            self.slowest = lap_ns
+        return lap_ns
+
+    def lap(self, index):
+        return self.splits[index] - (self.splits[index - 1] if index > 0 else 0)
+
+    def mean(self):
+        return self.splits[-1] // len(self.splits) if self.splits else None
+
+    def clear(self):
+        self.splits = array('q')
+        self.fastest = None
+        self.slowest = None
+
 class Stopwatch:
-    """秒表对象"""
+    """秒表对象
+
+    计时基于time.perf_counter_ns(), 与界面刷新频率无关。运行时记录开始的计数值,
+    暂停时把已经过的时间累计到elapsed_ns。
+    """
     def __init__(self, elapsed_time=0, running=False):
-        self.elapsed_time = elapsed_time
+        self.elapsed_ns = int(elapsed_time * 1_000_000_000)
         self.running = running
-        self.start_time = time.time() if running else 0
+        self.start_ns = time.perf_counter_ns() if running else 0
+        self.laps = LapLog()
+
+    def elapsed(self, now_ns=None):
+        """返回已计时的纳秒数"""
+        if not self.running:
+            return self.elapsed_ns
+        if now_ns is None:
+            now_ns = time.perf_counter_ns()
+        return self.elapsed_ns + now_ns - self.start_ns
+
+    @property
+    def elapsed_time(self):
+        return self.elapsed() / 1_000_000_000
+
+    def start(self):
+        if not self.running:
+            self.start_ns = time.perf_counter_ns()
+            self.running = True
+
+    def pause(self):
+        if self.running:
+            self.elapsed_ns = self.elapsed()
+            self.running = False
+
+    def reset(self):
+        self.running = False
+        self.elapsed_ns = 0
+        self.laps.clear()
+
+    def lap(self):
+        """记录一次计次, 返回本圈用时(纳秒)"""
+        return self.laps.append(self.elapsed())
 
     def to_dict(self):
         return {
             "type": "stopwatch",
             "elapsed_time": self.elapsed_time,
             "running": self.running,
-            "start_time": self.start_time
+            "start_time": time.time() - self.elapsed_time if self.running else 0,
+            "laps": list(self.laps.splits)
         }
 
     @staticmethod
     def from_dict(data):
+        # perf_counter_ns不能跨进程比较, 运行中的秒表从保存时的用时继续计时
         stopwatch = Stopwatch(data["elapsed_time"], data["running"])
-        stopwatch.start_time = data["start_time"]
+        stopwatch.laps = LapLog(data.get("laps", []))
         return stopwatch
 
+class StopwatchStore:
+    """多个命名秒表的紧凑存储
+
+    每个秒表占一个槽位, 各字段保存在并行数组里, 删除后的槽位会被复用。
+    开始、暂停、重置只改动一个槽位; 运行中的槽位单独记录, 显示时只刷新这些秒表。
+    """
+    def __init__(self):
+        self.names = []
+        self.elapsed_ns = array('q')  # 暂停前累计的纳秒数
+        self.start_ns = array('q')    # 运行时的开始计数值(perf_counter_ns)
+        self.live = bytearray()
+        self.running = set()
+        self._free = []
+
+    def __len__(self):
+        return len(self.names) - len(self._free)
+
+    def add(self, name, elapsed_ns=0, running=False):
+        if self._free:
+            slot = self._free.pop()
+            self.names[slot] = name
+            self.elapsed_ns[slot] = elapsed_ns
+            self.start_ns[slot] = 0
+            self.live[slot] = 1
+        else:
+            slot = len(self.names)
+            self.names.append(name)
+            self.elapsed_ns.append(elapsed_ns)
+            self.start_ns.append(0)
+            self.live.append(1)
+        if running:
+            self.start(slot)
+        return slot
+
+    def remove(self, slot):
+        self.running.discard(slot)
+        self.live[slot] = 0
+        self.names[slot] = None
+        self._free.append(slot)
+
+    def slots(self):
+        """按槽位顺序返回所有秒表"""
+        return [slot for slot in range(len(self.names)) if self.live[slot]]
+
+    def elapsed(self, slot, now_ns=None):
+        if slot not in self.running:
+            return self.elapsed_ns[slot]
+        if now_ns is None:
+            now_ns = time.perf_counter_ns()
+        return self.elapsed_ns[slot] + now_ns - self.start_ns[slot]
+
+    def start(self, slot):
+        if slot not in self.running:
+            self.start_ns[slot] = time.perf_counter_ns()
+            self.running.add(slot)
+
+    def pause(self, slot):
+        if slot in self.running:
+            self.elapsed_ns[slot] = self.elapsed(slot)
+            self.running.discard(slot)
+
+    def reset(self, slot):
+        self.running.discard(slot)
+        self.elapsed_ns[slot] = 0
+
+    def to_list(self):
+        return [{
+            "name": self.names[slot],
+            "elapsed_time": self.elapsed(slot) / 1_000_000_000,
+            "running": slot in self.running
+        } for slot in self.slots()]
+
+    @staticmethod
+    def from_list(data):
+        store = StopwatchStore()
+        for item in data:
+            store.add(item["name"], int(item["elapsed_time"] * 1_000_000_000), item["running"])
+        return store
+
 class TodoItem:
-    """待办事项对象"""
-    def __init__(self, title, description="", start_time=None, end_time=None, completed=False):
+    """待办事项对象
+
+    start_time和end_time为时区tz(None为本机时区)的当地时间;
+    start_at和end_at为对应的UTC时间戳(整数秒), 用于判断提醒时间, 修改时间后需调用reschedule()。
+    """
+    def __init__(self, title, description="", start_time=None, end_time=None, completed=False, tz=None):
+        self.uid = next(_entity_ids)
         self.title = title
         self.description = description
         self.start_time = start_time  # datetime对象
         self.end_time = end_time      # datetime对象
         self.completed = completed
+        self.tz = tz
         self.notified_start = False
         self.notified_end = False
+        self.reschedule()
+
+    def reschedule(self):
+        self.start_at = wall_to_utc(self.start_time, self.tz)
+        self.end_at = wall_to_utc(self.end_time, self.tz)
+
+    def local_start(self):
+        """开始时间换算为本机时区的当地时间, 用于和datetime.now()比较"""
+        if self.tz is None or self.start_at is None:
+            return self.start_time
+        return datetime.fromtimestamp(self.start_at)
 
     def to_dict(self):
         return {
@@ -150,7 +440,8 @@ class TodoItem:
             "description": self.description,
             "start_time": self.start_time.strftime("%Y-%m-%d %H:%M:%S") if self.start_time else None,
             "end_time": self.end_time.strftime("%Y-%m-%d %H:%M:%S") if self.end_time else None,
-            "completed": self.completed
+            "completed": self.completed,
+            "tz": self.tz
         }
 
     @staticmethod
@@ -162,9 +453,1127 @@ class TodoItem:
             data["description"],
             start_time,
             end_time,
-            data["completed"]
+            data["completed"],
+            data.get("tz")
         )
 
+# 核对的结果: missed_*为错过的实体, fired为已经处理过的数量, upcoming为尚未到时的数量
+ReconcileReport = namedtuple("ReconcileReport",
+                             ["missed_timers", "missed_alarms", "missed_todos", "fired", "upcoming"])
+
+def reconcile_missed_events(timers, alarms, todos, since, now_ts):
+    """一次性核对所有实体, 把每个实体归为错过、已处理或未到时
+
+    用于启动时和检测到休眠或时钟跳变后。since为上次确认过的UTC时间戳
+    (启动时为上次保存历史记录的时间, 旧文件没有时为None), now_ts为当前UTC时间戳。
+    同时更新实体状态: 错过的倒计时标记为结束, 错过的一次性闹钟关闭,
+    重复闹钟直接跳到下一个未来的时刻, 已过去的待办时间标记为已提醒。
+    """
+    missed_timers, missed_alarms, missed_todos = [], [], []
+    fired = upcoming = 0
+    for timer in timers:
+        if timer.running and timer.remaining() <= 0:
+            timer.finish()
+            missed_timers.append(timer)
+        elif timer.running or timer.paused:
+            upcoming += 1
+        else:
+            fired += 1
+    for alarm in alarms:
+        if not alarm.active:
+            fired += 1
+        elif alarm.fire_at <= now_ts:
+            if alarm.repeat == "once":
+                alarm.active = False
+            else:
+                alarm.schedule(now_ts)
+            missed_alarms.append(alarm)
+        else:
+            upcoming += 1
+    for todo in todos:
+        if todo.completed:
+            fired += 1
+            continue
+        missed = pending = False
+        for ts, flag in ((todo.start_at, "notified_start"), (todo.end_at, "notified_end")):
+            if ts is None:
+                continue
+            if ts > now_ts:
+                pending = True
+                continue
+            if since is not None and ts > since:
+                missed = True
+            setattr(todo, flag, True)
+        if missed:
+            missed_todos.append(todo)
+        elif pending:
+            upcoming += 1
+        else:
+            fired += 1
+    return ReconcileReport(missed_timers, missed_alarms, missed_todos, fired, upcoming)
+
+# 两次主时钟刷新之间, 墙上时钟的变化与实际经过的时间相差超过该秒数时视为系统时间被调整;
+# 实际经过的时间超过TICK_GAP_SECONDS时视为电脑休眠或程序被挂起
+CLOCK_JUMP_SECONDS = 2
+TICK_GAP_SECONDS = 5
+
+def elapsed_clock():
+    """实际经过的时间(秒), 包括休眠
+
+    Linux和macOS上的time.monotonic()在休眠时停止: Linux改用CLOCK_BOOTTIME,
+    macOS改用CLOCK_MONOTONIC(在macOS上休眠时继续计时);
+    Windows上time.monotonic()在休眠时继续计时, 直接使用。
+    """
+    if hasattr(time, "CLOCK_BOOTTIME"):
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+    if sys.platform == "darwin":
+        return time.clock_gettime(time.CLOCK_MONOTONIC)
+    return time.monotonic()
+
+# 秒表显示的帧间隔(毫秒), 约30帧每秒; 计时精度不受其影响
+STOPWATCH_FRAME_MS = 33
+
+# 每帧共享的时间快照: wall为time.time(), mono_ns为perf_counter_ns(), now为本地datetime
+FrameSnapshot = namedtuple("FrameSnapshot", ["wall", "mono_ns", "now"])
+
+class FrameDriver:
+    """独立窗口共享的刷新驱动
+
+    所有视图注册到同一个驱动上, 驱动按当前视图中最高的刷新频率运行,
+    每帧只取一次时间快照并分发给到期的视图。没有视图时停止计时。
+    """
+    def __init__(self, root):
+        self.root = root
+        self.views = {}  # view_id -> [刷新间隔(毫秒), 回调, 所属窗口, 下次到期(ns)]
+        self.interval = None
+        self._next_view_id = 1
+        self._after_id = None
+
+    @staticmethod
+    def snapshot():
+        wall = time.time()
+        return FrameSnapshot(wall, time.perf_counter_ns(), datetime.fromtimestamp(wall))
+
+    def register(self, callback, interval_ms=1000, widget=None):
+        """注册视图并立即绘制一次; 回调返回False或窗口销毁后自动注销"""
+        view_id = self._next_view_id
+        self._next_view_id += 1
+        snapshot = self.snapshot()
+        self.views[view_id] = [interval_ms, callback, widget,
+                               snapshot.mono_ns + interval_ms * 1_000_000]
+        if callback(snapshot) is False:
+            del self.views[view_id]
+        self._reschedule()
+        return view_id
+
+    def unregister(self, view_id):
+        if self.views.pop(view_id, None) is not None:
+            self._reschedule()
+
+    def release(self, widget):
+        """注销属于某个窗口的全部视图"""
+        view_ids = [view_id for view_id, view in self.views.items() if view[2] is widget]
+        for view_id in view_ids:
+            del self.views[view_id]
+        if view_ids:
+            self._reschedule()
+
+    def set_interval(self, view_id, interval_ms):
+        """修改视图的刷新间隔, 驱动频率随之升降"""
+        view = self.views.get(view_id)
+        if view is None or view[0] == interval_ms:
+            return
+        view[0] = interval_ms
+        view[3] = min(view[3], time.perf_counter_ns() + interval_ms * 1_000_000)
+        self._reschedule()
+
+    def _reschedule(self):
+        interval = min((view[0] for view in self.views.values()), default=None)
+        if interval == self.interval and (self._after_id is not None or interval is None):
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.interval = interval
+        if interval is not None:
+            self._after_id = self.root.after(interval, self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        snapshot = self.snapshot()
+        for view_id, view in list(self.views.items()):
+            interval_ms, callback, widget, due_ns = view
+            if widget is not None and not widget.winfo_exists():
+                self.views.pop(view_id, None)
+                continue
+            if snapshot.mono_ns < due_ns:
+                continue
+            # 落后超过一个周期时直接跳到下一帧, 不补画错过的帧
+            step = interval_ms * 1_000_000
+            view[3] = due_ns + step if due_ns + step > snapshot.mono_ns else snapshot.mono_ns + step
+            if callback(snapshot) is False:
+                self.views.pop(view_id, None)
+        self.interval = None
+        self._reschedule()
+
+# 把本地时间(不带时区)换算成整数秒, 用作索引和排序的键
+LOCAL_EPOCH = datetime(1970, 1, 1)
+
+def naive_seconds(moment):
+    return (moment - LOCAL_EPOCH) // timedelta(seconds=1)
+
+def todo_span(todo):
+    """返回待办事项覆盖的时间段(开始, 结束)的整数秒; 只有一端时视为一个时间点
+
+    按待办自己时区的当地时间计算, 用于日历等按日期显示的地方。
+    """
+    start = todo.start_time or todo.end_time
+    end = todo.end_time or todo.start_time
+    if start is None:
+        return None
+    return naive_seconds(start), naive_seconds(end)
+
+def todo_utc_span(todo):
+    """与todo_span相同, 但使用UTC时间戳, 不同时区的待办可以互相比较; 用于冲突检测和空闲时间"""
+    start = todo.start_at if todo.start_at is not None else todo.end_at
+    end = todo.end_at if todo.end_at is not None else todo.start_at
+    if start is None:
+        return None
+    return start, end
+
+def year_todo_density(starts, ends, year):
+    """统计一年中每天覆盖的待办数量
+
+    starts和ends为待办开始/结束时间的整数秒(见naive_seconds)。先把每个时间段
+    截取到当年, 在开始日+1、结束日的下一天-1, 再做前缀和得到每天的数量。
+    有NumPy时整个过程用bincount一次完成, 否则用纯Python循环。
+    """
+    first_day = (datetime(year, 1, 1) - LOCAL_EPOCH).days
+    day_count = (datetime(year + 1, 1, 1) - datetime(year, 1, 1)).days
+    np = optional_numpy()
+    if np is not None:
+        start_days = np.asarray(starts, dtype=np.int64) // 86400 - first_day
+        end_days = np.asarray(ends, dtype=np.int64) // 86400 - first_day
+        in_year = (end_days >= 0) & (start_days < day_count)
+        start_days = np.clip(start_days[in_year], 0, day_count - 1)
+        end_days = np.clip(end_days[in_year], 0, day_count - 1)
+        delta = (np.bincount(start_days, minlength=day_count + 1)
+                 - np.bincount(end_days + 1, minlength=day_count + 1))
+        return np.cumsum(delta[:day_count]).tolist()
+        
+    delta = [0] * (day_count + 1)
+    for start, end in zip(starts, ends):
+        start_day = start // 86400 - first_day
+        end_day = end // 86400 - first_day
+        if end_day < 0 or start_day >= day_count:
+            continue
+        delta[max(start_day, 0)] += 1
+        delta[min(end_day, day_count - 1) + 1] -= 1
+    density = []
+    running = 0
+    for change in delta[:day_count]:
+        running += change
+        density.append(running)
+    return density
+
+def find_todo_conflicts(todos):
+    """用扫描线找出时间重叠(按UTC时间)的未完成待办, 返回其uid集合, O(n log n)
+
+    按开始时间依次扫描, 堆中保存仍未结束的待办; 当前待办开始时若堆不为空就与它们重叠。
+    另用一个堆保存尚未标记的进行中待办, 每个待办只会被标记一次。
+    """
+    spans = []
+    for todo in todos:
+        span = todo_utc_span(todo)
+        if span is not None and not todo.completed:
+            spans.append((span[0], span[1], todo.uid))
+    spans.sort()
+    
+    conflicts = set()
+    active = []    # (结束时间, uid), 仍在进行的待办
+    unmarked = []  # (结束时间, uid), 仍在进行且尚未标记为冲突的待办
+    for start, end, uid in spans:
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        while unmarked and unmarked[0][0] <= start:
+            heapq.heappop(unmarked)
+        if active:
+            conflicts.add(uid)
+            conflicts.update(other for _, other in unmarked)
+            unmarked.clear()
+        elif end > start:
+            heapq.heappush(unmarked, (end, uid))
+        if end > start:
+            heapq.heappush(active, (end, uid))
+    return conflicts
+
+class TodoMonthIndex:
+    """按月份索引有待办事项的日期
+
+    (年, 月) -> 当月每天的待办数量(下标为日), 跨天的待办计入覆盖的每一天。
+    在增删改待办时增量维护, 日历翻页只需读取当月的计数, 与待办总数无关。
+    """
+    def __init__(self, todos=()):
+        self.months = {}
+        for todo in todos:
+            self.add(todo)
+
+    @staticmethod
+    def _todo_days(todo):
+        start = todo.start_time or todo.end_time
+        end = todo.end_time or todo.start_time
+        if start is None:
+            return []
+        day, last = start.date(), end.date()
+        days = []
+        while day <= last:
+            days.append((day.year, day.month, day.day))
+            day += timedelta(days=1)
+        return days
+
+    def add(self, todo):
+        """加入待办事项, 返回受影响的(年, 月)集合"""
+        months = set()
+        for year, month, day in self._todo_days(todo):
+            counts = self.months.get((year, month))
+            if counts is None:
+                counts = self.months[(year, month)] = array('I', [0]) * 32
+            counts[day] += 1
+            months.add((year, month))
+        return months
+
+    def remove(self, todo):
+        """移除待办事项, 返回受影响的(年, 月)集合"""
+        months = set()
+        for year, month, day in self._todo_days(todo):
+            counts = self.months[(year, month)]
+            counts[day] -= 1
+            if not any(counts):
+                del self.months[(year, month)]
+            months.add((year, month))
+        return months
+
+    def days(self, year, month):
+        """返回某月有待办事项的日期集合"""
+        counts = self.months.get((year, month))
+        if counts is None:
+            return set()
+        return {day for day in range(1, 32) if counts[day]}
+
+def shift_month(year, month, delta):
+    """返回(year, month)之后第delta个月的(年, 月)"""
+    year, month = divmod(year * 12 + month - 1 + delta, 12)
+    return year, month + 1
+
+# 日历一个月的视图模型: weeks为calendar.monthcalendar的结果, todo_days为有待办的日期集合,
+# conflict_days为有时间冲突待办的日期集合
+MonthModel = namedtuple("MonthModel", ["weeks", "todo_days", "conflict_days"])
+
+class MonthModelCache:
+    """日历月份视图模型的LRU缓存
+
+    按(年, 月)缓存计算好的日历网格和待办标记, 超过容量时淘汰最久未用的月份。
+    待办事项变化时只让它覆盖的月份失效。
+    """
+    def __init__(self, build_model, capacity=24):
+        self.build_model = build_model
+        self.capacity = capacity
+        self.models = OrderedDict()
+
+    def get(self, year, month):
+        key = (year, month)
+        model = self.models.get(key)
+        if model is None:
+            model = self._store(key)
+        else:
+            self.models.move_to_end(key)
+        return model
+
+    def prefetch(self, year, month):
+        """预先计算某月, 已缓存时什么都不做"""
+        if (year, month) not in self.models:
+            self._store((year, month))
+
+    def _store(self, key):
+        model = self.build_model(*key)
+        self.models[key] = model
+        while len(self.models) > self.capacity:
+            self.models.popitem(last=False)
+        return model
+
+    def invalidate(self, months):
+        for key in months:
+            self.models.pop(key, None)
+
+    def clear(self):
+        self.models.clear()
+
+class _IntervalNode:
+    """区间索引(树堆)的节点, max_end为子树中最大的结束时间"""
+    __slots__ = ("key", "end", "max_end", "todo", "priority", "left", "right")
+
+    def __init__(self, key, end, todo, priority):
+        self.key = key  # (开始时间, uid)
+        self.end = end
+        self.max_end = end
+        self.todo = todo
+        self.priority = priority
+        self.left = None
+        self.right = None
+
+    def refresh(self):
+        max_end = self.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+class TodoIntervalIndex:
+    """待办事项时间段的区间索引
+
+    用树堆(按(开始时间, uid)排序的随机平衡二叉树)保存条目, 每个节点记录子树中最大的结束时间。
+    查询与某个时间段重叠的待办时, 按中序遍历并剪掉结束得太早的子树, 遇到开始得太晚的条目即停止,
+    期望代价为O(log n + k·log n)。增删只沿一条从根到叶的路径旋转并更新最大结束时间, 期望O(log n)。
+    初始建立时先排序一次, 再直接构造平衡的树, O(n log n)。
+    span为取待办时间段的函数: todo_span按当地时间, todo_utc_span按UTC时间。
+    """
+    def __init__(self, todos=(), span=todo_span):
+        self.span = span
+        self.spans = {}  # uid -> 加入索引时的(开始, 结束)整数秒, 用于移除和统计
+        items = []
+        for todo in todos:
+            span = self.span(todo)
+            if span is not None:
+                self.spans[todo.uid] = span
+                items.append(((span[0], todo.uid), span[1], todo))
+        items.sort(key=lambda item: item[0])
+        self.root = self._build(items, 0, len(items), 0, max(len(items), 1))
+
+    @classmethod
+    def _build(cls, items, lo, hi, depth, total):
+        """由有序条目直接构造平衡的树; 按层分配递减的优先级, 使其满足堆的性质"""
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        key, end, todo = items[mid]
+        # 第depth层的优先级落在按层序编号[2^depth - 1, 2^(depth+1) - 1)对应的区间内
+        priority = 1.0 - ((1 << depth) - 1 + random.random() * (1 << depth)) / total
+        node = _IntervalNode(key, end, todo, priority)
+        node.left = cls._build(items, lo, mid, depth + 1, total)
+        node.right = cls._build(items, mid + 1, hi, depth + 1, total)
+        node.refresh()
+        return node
+
+    def __len__(self):
+        return len(self.spans)
+
+    @staticmethod
+    def _rotate_right(node):
+        top = node.left
+        node.left = top.right
+        node.refresh()
+        top.right = node
+        top.refresh()
+        return top
+
+    @staticmethod
+    def _rotate_left(node):
+        top = node.right
+        node.right = top.left
+        node.refresh()
+        top.left = node
+        top.refresh()
+        return top
+
+    def _insert(self, node, new):
+        if node is None:
+            return new
+        if new.key < node.key:
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                return self._rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                return self._rotate_left(node)
+        node.refresh()
+        return node
+
+    def _merge(self, left, right):
+        """合并两棵树, left中的键都小于right中的键"""
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            left.refresh()
+            return left
+        right.left = self._merge(left, right.left)
+        right.refresh()
+        return right
+
+    def _delete(self, node, key):
+        if node is None:
+            return None
+        if key < node.key:
+            node.left = self._delete(node.left, key)
+        elif key > node.key:
+            node.right = self._delete(node.right, key)
+        else:
+            return self._merge(node.left, node.right)
+        node.refresh()
+        return node
+
+    def add(self, todo):
+        span = self.span(todo)
+        if span is None:
+            return
+        self.spans[todo.uid] = span
+        node = _IntervalNode((span[0], todo.uid), span[1], todo, random.random())
+        self.root = self._insert(self.root, node)
+
+    def remove(self, todo):
+        span = self.spans.pop(todo.uid, None)
+        if span is not None:
+            self.root = self._delete(self.root, (span[0], todo.uid))
+
+    def _from(self, lo):
+        """中序遍历开始时间不早于lo的节点"""
+        stack = []
+        node = self.root
+        while node is not None:
+            if node.key[0] >= lo:
+                stack.append(node)
+                node = node.left
+            else:
+                node = node.right
+        while stack:
+            node = stack.pop()
+            yield node
+            node = node.right
+            while node is not None:
+                stack.append(node)
+                node = node.left
+
+    def bounds(self):
+        """返回全部条目的开始时间列表和结束时间列表(不排序), 用于统计"""
+        spans = list(self.spans.values())
+        return [span[0] for span in spans], [span[1] for span in spans]
+
+    def items(self):
+        """按开始时间顺序返回全部(开始, 结束, 待办)"""
+        return [(node.key[0], node.end, node.todo) for node in self._from(float("-inf"))]
+
+    def find(self, lo, hi):
+        """返回开始早于hi且结束不早于lo的待办事项, 按开始时间排序; lo和hi为整数秒"""
+        found = []
+        stack = []
+        node = self.root
+        while True:
+            while node is not None and node.max_end >= lo:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.key[0] >= hi:
+                break
+            if node.end >= lo:
+                found.append(node.todo)
+            node = node.right
+        return found
+
+    def overlapping(self, start, end):
+        """返回与[start, end)时间段重叠的待办事项; 用于按当地时间建立的索引"""
+        return self.find(naive_seconds(start), naive_seconds(end))
+
+    def on_day(self, day):
+        """返回覆盖某一天的待办事项"""
+        start = datetime(day.year, day.month, day.day)
+        return self.overlapping(start, start + timedelta(days=1))
+
+    def starting_between(self, lo, hi, skip=0, limit=None):
+        """按开始时间顺序返回开始于[lo, hi)的待办事项, 跳过前skip个, 最多limit个; lo和hi为整数秒"""
+        todos = []
+        for node in self._from(lo):
+            if node.key[0] >= hi or (limit is not None and len(todos) >= limit):
+                break
+            if skip:
+                skip -= 1
+            else:
+                todos.append(node.todo)
+        return todos
+
+class BusyIntervals:
+    """未完成待办所占时间的合并区间, 用于查找空闲时间
+
+    从按开始时间排序的区间索引(按UTC时间建立)一次线性合并得到互不重叠的有序区间;
+    待办变化时只标记过期, 下次查询时才重新合并。
+    """
+    def __init__(self, interval_index):
+        self.interval_index = interval_index
+        self.starts = []
+        self.ends = []
+        self.dirty = True
+
+    def invalidate(self):
+        self.dirty = True
+
+    def _merge(self):
+        starts, ends = [], []
+        for start, end, todo in self.interval_index.items():
+            if todo.completed or end <= start:
+                continue
+            if ends and start <= ends[-1]:
+                if end > ends[-1]:
+                    ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts, self.ends = starts, ends
+        self.dirty = False
+
+    def free_slots(self, lo, hi, duration, limit=20):
+        """返回[lo, hi)内最早的不少于duration秒的空闲时间段(开始, 结束), 最多limit个"""
+        if self.dirty:
+            self._merge()
+        slots = []
+        cursor = lo
+        position = bisect.bisect_right(self.ends, lo)
+        while position < len(self.starts) and self.starts[position] < hi and len(slots) < limit:
+            if self.starts[position] - cursor >= duration:
+                slots.append((cursor, self.starts[position]))
+            cursor = max(cursor, self.ends[position])
+            position += 1
+        if len(slots) < limit and hi - cursor >= duration:
+            slots.append((cursor, hi))
+        return slots
+
+class TodoSearchIndex:
+    """待办事项标题和描述的倒排索引
+
+    中文没有空格分词, 因此把文本(转为小写)切成单字和相邻两字(二元组)作为词项。
+    查询单个字时直接取单字的倒排表; 查询更长的字符串时取其所有二元组倒排表的交集,
+    再用子串匹配确认, 这样前缀和任意子串查询都只需查看少量候选。
+    空格分隔的多个关键词之间为"与"的关系。
+    """
+    def __init__(self, todos=()):
+        self.postings = {}  # 词项 -> 包含它的待办uid集合
+        self.texts = {}     # uid -> 建立索引时的文本, 用于确认匹配和移除
+        for todo in todos:
+            self.add(todo)
+
+    @staticmethod
+    def _text(todo):
+        return f"{todo.title}\n{todo.description}".lower()
+
+    @staticmethod
+    def _tokens(text):
+        tokens = set(text)
+        tokens.update(text[i:i + 2] for i in range(len(text) - 1))
+        return tokens
+
+    def add(self, todo):
+        text = self._text(todo)
+        self.texts[todo.uid] = text
+        for token in self._tokens(text):
+            self.postings.setdefault(token, set()).add(todo.uid)
+
+    def remove(self, todo):
+        text = self.texts.pop(todo.uid, None)
+        if text is None:
+            return
+        for token in self._tokens(text):
+            uids = self.postings[token]
+            uids.discard(todo.uid)
+            if not uids:
+                del self.postings[token]
+
+    def _match_term(self, term):
+        if len(term) == 1:
+            return set(self.postings.get(term, ()))
+        grams = sorted((self.postings.get(term[i:i + 2], set()) for i in range(len(term) - 1)), key=len)
+        candidates = set(grams[0])
+        for uids in grams[1:]:
+            if not candidates:
+                break
+            candidates &= uids
+        texts = self.texts
+        return {uid for uid in candidates if term in texts[uid]}
+
+    def search(self, query):
+        """返回匹配查询的待办uid集合; 查询为空时返回None表示不过滤"""
+        terms = query.lower().split()
+        if not terms:
+            return None
+        result = None
+        for term in sorted(terms, key=len, reverse=True):
+            matches = self._match_term(term)
+            result = matches if result is None else result & matches
+            if not result:
+                break
+        return result
+
+class SortOrder:
+    """列表的排序状态: 按某一列排好序的实体序列
+
+    各列的排序键在实体加入或修改时计算一次并缓存(时间用整数而不是格式化后的字符串),
+    增删改只用二分查找调整一个位置, 换排序列时才整体排序一次, 倒序只需翻转显示顺序。
+    column为None时按uid即创建顺序排列。
+    """
+    def __init__(self, key_funcs, entities=()):
+        self.key_funcs = key_funcs  # 列名 -> 函数(实体) -> 排序键
+        self.column = None
+        self.reverse = False
+        self.keys = {}     # uid -> {列名: 排序键}
+        self.entities = {}  # uid -> 实体
+        self.entries = []  # 当前排序列的(排序键, uid), 升序
+        self.items = []    # 与entries对齐的实体
+        self.listeners = []  # 排序方式改变后调用, 共用同一排序的各个列表借此同步
+        for entity in entities:
+            self.add(entity)
+
+    def _entry(self, uid):
+        return (self.keys[uid].get(self.column), uid)
+
+    def _display_index(self, i):
+        return len(self.entries) - 1 - i if self.reverse else i
+
+    def add(self, entity):
+        """加入实体, 返回它在显示顺序中的位置"""
+        self.keys[entity.uid] = {column: key(entity) for column, key in self.key_funcs.items()}
+        self.entities[entity.uid] = entity
+        entry = self._entry(entity.uid)
+        i = bisect.bisect_left(self.entries, entry)
+        self.entries.insert(i, entry)
+        self.items.insert(i, entity)
+        return self._display_index(i)
+
+    def remove(self, entity):
+        if entity.uid not in self.keys:
+            return
+        i = bisect.bisect_left(self.entries, self._entry(entity.uid))
+        del self.entries[i]
+        del self.items[i]
+        del self.keys[entity.uid]
+        del self.entities[entity.uid]
+
+    def update(self, entity):
+        """实体的字段变化后重新计算排序键, 返回新的显示位置"""
+        self.remove(entity)
+        return self.add(entity)
+
+    def sort_by(self, column):
+        """按指定列排序, 对当前排序列再次调用则切换正序/倒序"""
+        if column == self.column:
+            self.reverse = not self.reverse
+            return
+        self.column = column
+        self.reverse = False
+        # (排序键, uid)互不相同, 不会比较到实体本身
+        pairs = sorted((self._entry(item.uid), item) for item in self.items)
+        self.entries = [entry for entry, _ in pairs]
+        self.items = [item for _, item in pairs]
+
+    def display(self):
+        """按显示顺序返回实体列表"""
+        return self.items[::-1] if self.reverse else self.items
+
+    def view(self):
+        """按显示顺序的只读视图, 不复制实体列表, 之后的增删和排序都会反映出来"""
+        return SortedView(self)
+
+    def ordered(self, uids):
+        """按显示顺序返回给定uid对应的实体, 只对这些实体排序; 不在序列中的uid忽略"""
+        entries = sorted((self._entry(uid) for uid in uids if uid in self.entities), reverse=self.reverse)
+        return [self.entities[uid] for _, uid in entries]
+
+class SortedView:
+    """SortOrder当前显示顺序的视图, 只支持len()和切片, 用于分页读取"""
+    def __init__(self, order):
+        self.order = order
+
+    def __len__(self):
+        return len(self.order.items)
+
+    def __getitem__(self, index):
+        items = self.order.items
+        if not self.order.reverse:
+            return items[index]
+        start, stop, _ = index.indices(len(items))
+        return items[len(items) - stop:len(items) - start][::-1]
+
+def bind_sort_headings(tree, order, on_sort):
+    """点击表头按该列排序, 再点一次倒序; 表头上用箭头标出当前排序列
+
+    同一个SortOrder可以绑定到多个列表(主界面和历史记录窗口), 任一列表改变排序时
+    所有列表都更新箭头并调用各自的on_sort; 列表销毁时自动解除绑定。
+    """
+    titles = {column: tree.heading(column, 'text') for column in order.key_funcs}
+    def draw_arrows():
+        for name, title in titles.items():
+            arrow = (" ▼" if order.reverse else " ▲") if name == order.column else ""
+            tree.heading(name, text=title + arrow)
+    def refresh():
+        draw_arrows()
+        on_sort()
+    def sort(column):
+        order.sort_by(column)
+        for listener in list(order.listeners):
+            listener()
+    for column in titles:
+        tree.heading(column, command=lambda column=column: sort(column))
+    def unbind(event):
+        if refresh in order.listeners:
+            order.listeners.remove(refresh)
+    order.listeners.append(refresh)
+    tree.bind("<Destroy>", unbind, add="+")
+    draw_arrows()
+
+def move_tree_rows(tree, order):
+    """按排序结果移动已有的行(iid为实体uid), 不重建列表; 不在列表中的实体跳过"""
+    index = 0
+    for entity in order.display():
+        iid = str(entity.uid)
+        if tree.exists(iid):
+            tree.move(iid, "", index)
+            index += 1
+
+def move_tree_row(tree, iid, index):
+    # 先摘下再放回, 使index按不含该行的位置计算
+    tree.detach(iid)
+    tree.move(iid, "", index)
+
+def timer_sort_key(timer):
+    # 计时中的按截止时刻, 暂停的按剩余时间, 排序不随时间推移而改变
+    if timer.running:
+        return (0, timer.deadline_ns)
+    if timer.paused:
+        return (1, timer.remaining_ns)
+    return (2, 0)
+
+def optional_time_key(ts):
+    # 按UTC时间戳排序, 不同时区的待办也能正确比较; 没有设置时间的排在最后
+    return (ts is None, ts or 0)
+
+TIMER_SORT_KEYS = {
+    'name': lambda timer: timer.name,
+    'time': timer_sort_key,
+    'status': lambda timer: timer_sort_key(timer)[0],
+}
+ALARM_SORT_KEYS = {
+    'name': lambda alarm: alarm.name,
+    'time': lambda alarm: alarm.hour * 60 + alarm.minute,
+    'repeat': lambda alarm: ("once", "daily", "weekend").index(alarm.repeat),
+    'status': lambda alarm: not alarm.active,
+}
+COUNTDOWN_SORT_KEYS = {
+    'name': lambda countdown: countdown.name,
+    'days': lambda countdown: countdown.target_date.toordinal(),
+    'date': lambda countdown: countdown.target_date.toordinal(),
+}
+TODO_SORT_KEYS = {
+    'title': lambda todo: todo.title,
+    'start': lambda todo: optional_time_key(todo.start_at),
+    'end': lambda todo: optional_time_key(todo.end_at),
+    # 未完成的按开始时间排列, 已开始(进行中)的自然排在未开始的前面, 时间推移后顺序仍然正确
+    'status': lambda todo: (todo.completed, todo.start_at is not None, todo.start_at or 0),
+}
+
+class PagedTreeLoader:
+    """分页向Treeview插入行(iid为实体uid): 先插入一页, 滚动到底部附近时再插入下一页"""
+    def __init__(self, tree, row_values, scrollbar=None, page_size=200):
+        self.tree = tree
+        self.row_values = row_values
+        self.scrollbar = scrollbar
+        self.page_size = page_size
+        self.items = []
+        self.loaded = 0  # 已插入的行数, 总是items的前缀
+        self.pending = False
+        tree.configure(yscrollcommand=self.on_scroll)
+
+    def reset(self, items):
+        """更换要显示的实体序列(列表或SortedView, 不复制), 清空列表后加载第一页"""
+        self.tree.delete(*self.tree.get_children())
+        self.items = items
+        self.loaded = 0
+        self.load_page()
+
+    def load_page(self):
+        self.pending = False
+        end = min(self.loaded + self.page_size, len(self.items))
+        for item in self.items[self.loaded:end]:
+            # SortedView随数据变化, 加载之间新加入的实体可能已经插入过
+            if not self.tree.exists(str(item.uid)):
+                self.tree.insert("", tk.END, iid=str(item.uid), values=self.row_values(item))
+        self.loaded = end
+
+    def refresh(self, item):
+        if self.tree.exists(str(item.uid)):
+            self.tree.item(str(item.uid), values=self.row_values(item))
+
+    def remove(self, item):
+        """实体已从数据中删除后调用; SortedView中的实体已随SortOrder删除, 列表需要在这里删除"""
+        if isinstance(self.items, list):
+            try:
+                self.items.remove(item)
+            except ValueError:
+                pass
+        if self.tree.exists(str(item.uid)):
+            self.tree.delete(str(item.uid))
+            self.loaded -= 1
+
+    def on_scroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        # 接近底部时加载下一页
+        if float(last) > 0.9 and self.loaded < len(self.items) and not self.pending:
+            self.pending = True
+            self.tree.after_idle(self.load_page)
+
+class HistoryQuery:
+    """历史记录的筛选条件, 例如: status:done after:2026-01-01 name:~report
+
+    status:状态   done/active/paused/pending, 也可以写列表中显示的中文状态
+    after:日期    日期(YYYY-MM-DD)当天及以后
+    before:日期   日期当天以前
+    name:名称     名称完全相同(不区分大小写); name:~文字 表示名称包含该文字
+    其他文字      名称包含该文字(待办事项同时搜索描述)
+    各条件之间为"与"的关系; 格式错误时抛出ValueError。
+    """
+    STATUS_ALIASES = {
+        "done": "done", "已完成": "done", "已结束": "done", "已过期": "done", "off": "done", "关闭": "done",
+        "active": "active", "running": "active", "进行中": "active", "on": "active", "开启": "active",
+        "paused": "paused", "已暂停": "paused",
+        "pending": "pending", "未开始": "pending",
+    }
+
+    def __init__(self, text):
+        self.status = None
+        self.after = None    # datetime, 含当天
+        self.before = None   # datetime, 不含当天
+        self.names = []      # (是否子串匹配, 小写文字)
+        self.words = []      # 小写文字
+        try:
+            tokens = shlex.split(text)
+        except ValueError:
+            raise ValueError("引号不匹配")
+        for token in tokens:
+            field, sep, value = token.partition(":")
+            if not sep:
+                self.words.append(token.lower())
+            elif field == "status":
+                if value.lower() not in self.STATUS_ALIASES:
+                    raise ValueError(f"未知的状态: {value}")
+                self.status = self.STATUS_ALIASES[value.lower()]
+            elif field in ("after", "before"):
+                try:
+                    day = datetime.strptime(value, "%Y-%m-%d")
+                except ValueError:
+                    raise ValueError(f"无效日期: {value}, 请使用YYYY-MM-DD")
+                if field == "after":
+                    self.after = day
+                else:
+                    self.before = day
+            elif field == "name":
+                if value.startswith("~"):
+                    self.names.append((True, value[1:].lower()))
+                else:
+                    self.names.append((False, value.lower()))
+            else:
+                raise ValueError(f"未知的筛选条件: {field}")
+
+    def is_empty(self):
+        return (self.status is None and self.after is None and self.before is None
+                and not self.names and not self.words)
+
+    @staticmethod
+    def entity_name(entity):
+        return entity.title if isinstance(entity, TodoItem) else entity.name
+
+    @staticmethod
+    def entity_date(entity):
+        """用于after/before比较的时间: 待办为开始(或结束)时间, 倒计时为结束时间, 闹钟为下次响铃时间"""
+        if isinstance(entity, TodoItem):
+            return entity.start_time or entity.end_time
+        if isinstance(entity, CountdownTimer):
+            return entity.end_time
+        if isinstance(entity, Alarm):
+            return entity.alarm_time
+        return entity.target_date
+
+    @staticmethod
+    def entity_status(entity, now):
+        if isinstance(entity, TodoItem):
+            if entity.completed:
+                return "done"
+            return "pending" if entity.start_time and now < entity.local_start() else "active"
+        if isinstance(entity, CountdownTimer):
+            return "active" if entity.running else "paused" if entity.paused else "done"
+        if isinstance(entity, Alarm):
+            return "active" if entity.active else "done"
+        return "active" if entity.target_date.date() >= now.date() else "done"
+
+    def predicate(self, now):
+        """把条件编译为一个判断函数, 只检查设置了的条件"""
+        checks = []
+        if self.status is not None:
+            checks.append(lambda entity: self.entity_status(entity, now) == self.status)
+        if self.after is not None or self.before is not None:
+            after, before = self.after, self.before
+            def check_date(entity):
+                moment = self.entity_date(entity)
+                return (moment is not None and (after is None or moment >= after)
+                        and (before is None or moment < before))
+            checks.append(check_date)
+        for contains, value in self.names:
+            if contains:
+                checks.append(lambda entity, value=value: value in self.entity_name(entity).lower())
+            else:
+                checks.append(lambda entity, value=value: self.entity_name(entity).lower() == value)
+        for word in self.words:
+            def check_word(entity, word=word):
+                if isinstance(entity, TodoItem):
+                    return word in f"{entity.title}\n{entity.description}".lower()
+                return word in entity.name.lower()
+            checks.append(check_word)
+        return lambda entity: all(check(entity) for check in checks)
+
+# 历史记录窗口中已创建的标签页; 秒表页没有列表, tree/order/loader为None
+HistoryTab = namedtuple("HistoryTab", ["kind", "tree", "order", "loader"])
+
+class VirtualTreeview:
+    """只生成可见行的列表
+
+    数据是一个按显示顺序排列的对象序列, 控件里只保留视口内的行(加上少量预留行),
+    这些行在滚动时原地改写内容。每行的文字由format_row(对象, 当前时间)在第一次显示时生成,
+    返回(values, tags, 有效期); 有效期为None表示一直有效, 否则到该时间后重新生成。
+    """
+    def __init__(self, parent, columns, format_row, height=10, overscan=5):
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show='headings',
+                                 height=height, selectmode='browse')
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        
+        self.format_row = format_row
+        self.overscan = overscan
+        self.items = []
+        self.top = 0
+        self.visible = height
+        self.row_ids = []     # 已创建的行, 滚动时复用
+        self.cache = {}       # id(对象) -> (values, tags, 有效期)
+        self.selected = None  # 选中的对象, 滚出视口后仍然保留
+        
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<Configure>", self.on_configure)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.visible))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.visible))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_items(self, items):
+        """更换数据序列(不复制), 清空格式缓存后重画可见行"""
+        self.items = items
+        self.cache = {}
+        self.render()
+
+    def refresh(self):
+        self.cache = {}
+        self.render()
+
+    def selected_item(self):
+        return self.selected
+
+    def clear_selection(self):
+        self.selected = None
+        self.render()
+
+    def render(self):
+        total = len(self.items)
+        self.top = max(0, min(self.top, total - self.visible))
+        wanted = min(self.visible + self.overscan, total - self.top)
+        while len(self.row_ids) < wanted:
+            self.row_ids.append(self.tree.insert("", tk.END))
+        while len(self.row_ids) > wanted:
+            self.tree.delete(self.row_ids.pop())
+            
+        now = datetime.now()
+        selected_row = None
+        for offset, row_id in enumerate(self.row_ids):
+            item = self.items[self.top + offset]
+            cached = self.cache.get(id(item))
+            if cached is None or (cached[2] is not None and now >= cached[2]):
+                cached = self.cache[id(item)] = self.format_row(item, now)
+            self.tree.item(row_id, values=cached[0], tags=cached[1])
+            if item is self.selected:
+                selected_row = row_id
+                
+        if selected_row is not None:
+            self.tree.selection_set(selected_row)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        self.tree.yview_moveto(0)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll(self, rows):
+        self.top += rows
+        self.render()
+        return "break"
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.top = int(float(value) * len(self.items))
+        elif unit == "pages":
+            self.top += int(value) * self.visible
+        else:
+            self.top += int(value)
+        self.render()
+
+    def on_mousewheel(self, event):
+        # Windows每格为120, macOS为1
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll(-3 * step)
+
+    def on_configure(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        visible = max(1, (event.height - 25) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self.row_ids:
+            self.selected = self.items[self.top + self.row_ids.index(selection[0])]
+
+    def move_selection(self, delta):
+        """键盘上下移动选中行, 到视口边缘时滚动"""
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self.row_ids:
+            return "break"
+        position = self.top + self.row_ids.index(selection[0]) + delta
+        if 0 <= position < len(self.items):
+            self.selected = self.items[position]
+            if position < self.top:
+                self.top = position
+            elif position >= self.top + self.visible:
+                self.top = position - self.visible + 1
+            self.render()
+        return "break"
+
 class ClockApp:
     def __init__(self, root):
         self.root = root
@@ -174,18 +1583,47 @@ class ClockApp:
 
         # 初始化数据结构
         self.timers = []     # 存储多个倒计时器
+        self.active_timers = {}  # 计时中的倒计时器 uid -> 对象, 暂停和结束的不参与每秒刷新
         self.alarms = []     # 存储多个闹钟
         self.countdowns = [] # 存储多个倒计日
         self.stopwatch = Stopwatch()  # 秒表
+        self.stopwatches = StopwatchStore()  # 多个命名秒表
+        self.stopwatch_list_view = None      # 多秒表列表的刷新视图, 只在有秒表运行时注册
         self.todos = []      # 存储待办事项
         self.current_month = datetime.now().month
         self.current_year = datetime.now().year
+        self.month_models = MonthModelCache(self.build_month_model)  # 日历月份视图模型缓存
+        self.calendar_prefetch_id = None
+        
+        # 独立窗口共享的刷新驱动
+        self.frame_driver = FrameDriver(root)
+        self.stopwatch_views = set()  # 显示秒表的视图, 其刷新频率随秒表状态变化
+        self.detached_windows = {}    # (实体类型, 实体ID) -> 独立窗口, 每个实体最多一个
+        self.last_tick = None         # 上次主时钟刷新结束时的(墙上时钟, 单调时钟, elapsed_clock()), 用于发现时钟跳变
+        
+        # 除第一页外, 标签页的控件在第一次显示时才创建; 创建前以下控件为None,
+        # 更新列表的方法直接跳过, 创建标签页时会按当前数据填充
+        self.alarm_tree = None
+        self.countdown_tree = None
+        self.stopwatch_label = None
+        self.lap_tree = None
+        self.stopwatch_tree = None
+        self.todo_view = None
         
         # 历史记录文件路径
         self.history_file = "clock_history.json"
         
-        # 加载历史记录
+        # 加载历史记录, 并核对程序关闭期间错过的提醒
+        self.history_saved_at = None
         self.load_history()
+        self.startup_report = reconcile_missed_events(
+            self.timers, self.alarms, self.todos, self.history_saved_at, int(time.time()))
+        self.active_timers = {timer.uid: timer for timer in self.timers if timer.running}
+        self.rebuild_todo_indexes()
+        self.timer_order = SortOrder(TIMER_SORT_KEYS, self.timers)
+        self.timer_order.sort_by('time')  # 默认最先到期的排在最前
+        self.alarm_order = SortOrder(ALARM_SORT_KEYS, self.alarms)
+        self.countdown_order = SortOrder(COUNTDOWN_SORT_KEYS, self.countdowns)
 
         # 创建顶部菜单栏
         self.create_menu_bar()
@@ -193,6 +1631,21 @@ class ClockApp:
         # 主界面布局
         self.create_widgets()
         self.update_main_clock()
+        if any(self.startup_report[:3]):
+            self.root.after_idle(lambda: self.show_missed_summary(self.startup_report, "程序关闭期间错过了以下提醒："))
+
+    def show_missed_summary(self, report, intro):
+        """用一个对话框汇总错过的提醒"""
+        lines = [intro, ""]
+        for label, entities in (("倒计时", report.missed_timers), ("闹钟", report.missed_alarms),
+                                ("待办事项", report.missed_todos)):
+            if entities:
+                names = "、".join(HistoryQuery.entity_name(entity) for entity in entities[:5])
+                lines.append(f"{label} ({len(entities)}): {names}" + (" 等" if len(entities) > 5 else ""))
+        if report.missed_alarms:
+            lines.append("")
+            lines.append("重复闹钟已调整到下一次响铃时间。")
+        messagebox.showinfo("错过的提醒", "\n".join(lines))
 
     def create_menu_bar(self):
         # 创建菜单栏
@@ -209,6 +1662,8 @@ class ClockApp:
         tools_menu = tk.Menu(menu_bar, tearoff=0)
         tools_menu.add_command(label="世界时钟", command=self.show_world_clock)
         tools_menu.add_command(label="日历", command=self.show_calendar)
+        tools_menu.add_command(label="日程", command=self.show_agenda)
+        tools_menu.add_command(label="查找空闲时间", command=self.show_free_time_finder)
         menu_bar.add_cascade(label="工具", menu=tools_menu)
         
         # 创建"关于"菜单
@@ -259,20 +1714,36 @@ class ClockApp:
         self.main_clock_label.pack(pady=20)
 
         # 创建主容器
-        main_notebook = ttk.Notebook(self.root)
-        main_notebook.pack(expand=True, fill='both', padx=10, pady=5)
-
-        # 创建功能标签页
-        self.create_timer_tab(main_notebook)
-        self.create_alarm_tab(main_notebook)
-        self.create_countdown_tab(main_notebook)
-        self.create_stopwatch_tab(main_notebook)
-        self.create_todo_tab(main_notebook)  # 新增ToDo标签页
-
-    def create_timer_tab(self, notebook):
+        self.main_notebook = ttk.Notebook(self.root)
+        self.main_notebook.pack(expand=True, fill='both', padx=10, pady=5)
+
+        # 创建功能标签页; 页面内容在第一次切换到该页时才创建, 启动时只创建第一页
+        self.pending_tabs = {}  # 页面路径 -> (页面, 创建函数)
+        for text, build in (("倒计时器", self.create_timer_tab),
+                            ("闹钟", self.create_alarm_tab),
+                            ("倒计日", self.create_countdown_tab),
+                            ("秒表", self.create_stopwatch_tab),
+                            ("待办事项", self.create_todo_tab)):
+            frame = ttk.Frame(self.main_notebook)
+            self.main_notebook.add(frame, text=text)
+            self.pending_tabs[str(frame)] = (frame, build)
+        self.main_notebook.bind("<<NotebookTabChanged>>", lambda e: self.build_main_tab(self.main_notebook.select()))
+        self.build_main_tab(self.main_notebook.select())
+
+    def build_main_tab(self, name):
+        """创建尚未创建的标签页内容"""
+        if name in self.pending_tabs:
+            frame, build = self.pending_tabs.pop(name)
+            build(frame)
+
+    def ensure_main_tab(self, build):
+        """需要使用某一页的控件时, 确保该页已经创建"""
+        for name, (frame, pending_build) in list(self.pending_tabs.items()):
+            if pending_build == build:
+                self.build_main_tab(name)
+
+    def create_timer_tab(self, timer_frame):
         # 倒计时器标签页
-        timer_frame = ttk.Frame(notebook)
-        notebook.add(timer_frame, text="倒计时器")
 
         # 输入区域
         input_frame = ttk.Frame(timer_frame)
@@ -303,17 +1774,20 @@ class ClockApp:
         self.timer_tree.column('time', width=100)
         self.timer_tree.column('status', width=80)
         self.timer_tree.pack(expand=True, fill='both', padx=10, pady=5)
+        bind_sort_headings(self.timer_tree, self.timer_order,
+                           lambda: move_tree_rows(self.timer_tree, self.timer_order))
         
         # 控制按钮
         btn_frame = ttk.Frame(timer_frame)
         btn_frame.pack(pady=5)
         ttk.Button(btn_frame, text="停止选中", command=self.stop_selected_timer).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="暂停/继续", command=self.toggle_selected_timer).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="独立窗口", command=self.open_selected_timer_window).pack(side=tk.LEFT, padx=5)
+        
+        self.update_timer_list()
 
-    def create_alarm_tab(self, notebook):
+    def create_alarm_tab(self, alarm_frame):
         # 闹钟标签页
-        alarm_frame = ttk.Frame(notebook)
-        notebook.add(alarm_frame, text="闹钟")
 
         # 输入区域
         input_frame = ttk.Frame(alarm_frame)
@@ -336,8 +1810,12 @@ class ClockApp:
         self.alarm_repeat.grid(row=0, column=7, padx=5)
         self.alarm_repeat.current(0)
         
+        ttk.Label(input_frame, text="时区:").grid(row=0, column=8)
+        self.alarm_tz = self.create_tz_combobox(input_frame)
+        self.alarm_tz.grid(row=0, column=9, padx=5)
+        
         ttk.Button(input_frame, text="添加闹钟", 
-                 command=self.add_alarm).grid(row=0, column=8, padx=10)
+                 command=self.add_alarm).grid(row=0, column=10, padx=10)
 
         # 闹钟列表
         columns = ('name', 'time', 'repeat', 'status')
@@ -351,17 +1829,19 @@ class ClockApp:
         self.alarm_tree.column('repeat', width=80)
         self.alarm_tree.column('status', width=80)
         self.alarm_tree.pack(expand=True, fill='both', padx=10, pady=5)
+        bind_sort_headings(self.alarm_tree, self.alarm_order,
+                           lambda: move_tree_rows(self.alarm_tree, self.alarm_order))
         
         # 控制按钮
         btn_frame = ttk.Frame(alarm_frame)
         btn_frame.pack(pady=5)
         ttk.Button(btn_frame, text="删除选中", command=self.delete_selected_alarm).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="独立窗口", command=self.open_selected_alarm_window).pack(side=tk.LEFT, padx=5)
+        
+        self.update_alarm_list()
 
-    def create_countdown_tab(self, notebook):
+    def create_countdown_tab(self, countdown_frame):
         # 倒计日标签页
-        countdown_frame = ttk.Frame(notebook)
-        notebook.add(countdown_frame, text="倒计日")
 
         # 输入区域
         input_frame = ttk.Frame(countdown_frame)
@@ -388,19 +1868,21 @@ class ClockApp:
         self.countdown_tree.column('days', width=100)
         self.countdown_tree.column('date', width=150)
         self.countdown_tree.pack(expand=True, fill='both', padx=10, pady=5)
+        bind_sort_headings(self.countdown_tree, self.countdown_order,
+                           lambda: move_tree_rows(self.countdown_tree, self.countdown_order))
         
         # 控制按钮
         btn_frame = ttk.Frame(countdown_frame)
         btn_frame.pack(pady=5)
         ttk.Button(btn_frame, text="删除选中", command=self.delete_selected_countdown).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="独立窗口", command=self.open_selected_countdown_window).pack(side=tk.LEFT, padx=5)
+        
+        self.update_countdown_list()
 
-    def create_stopwatch_tab(self, notebook):
+    def create_stopwatch_tab(self, stopwatch_frame):
         # 秒表标签页
-        stopwatch_frame = ttk.Frame(notebook)
-        notebook.add(stopwatch_frame, text="秒表")
         
-        self.stopwatch_label = tk.Label(stopwatch_frame, font=('Helvetica', 36))
+        self.stopwatch_label = tk.Label(stopwatch_frame, text="00:00.00", font=('Helvetica', 36))
         self.stopwatch_label.pack(pady=20)
         
         btn_frame = ttk.Frame(stopwatch_frame)
@@ -415,12 +1897,68 @@ class ClockApp:
         self.reset_btn = ttk.Button(btn_frame, text="重置", command=self.reset_stopwatch)
         self.reset_btn.pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(btn_frame, text="计次", command=self.lap_stopwatch).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="独立窗口", command=self.open_stopwatch_window).pack(side=tk.LEFT, padx=5)
-
-    def create_todo_tab(self, notebook):
+        
+        # 计次列表
+        self.lap_stats_label = ttk.Label(stopwatch_frame)
+        self.lap_stats_label.pack(pady=5)
+        
+        columns = ('lap', 'lap_time', 'split')
+        self.lap_tree = ttk.Treeview(stopwatch_frame, columns=columns, show='headings', height=6)
+        self.lap_tree.heading('lap', text='计次')
+        self.lap_tree.heading('lap_time', text='单圈')
+        self.lap_tree.heading('split', text='累计')
+        self.lap_tree.column('lap', width=60)
+        self.lap_tree.column('lap_time', width=120)
+        self.lap_tree.column('split', width=120)
+        self.lap_tree.pack(expand=True, fill='both', padx=10, pady=5)
+        self.update_lap_list()
+        
+        # 秒表显示由刷新驱动按帧率上限更新, 与主时钟的每秒刷新无关
+        self.register_stopwatch_view(
+            lambda snapshot: self.set_stopwatch_text(self.stopwatch_label, snapshot),
+            self.stopwatch_label)
+        
+        # 多秒表
+        multi_frame = ttk.LabelFrame(stopwatch_frame, text="多秒表")
+        multi_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        input_frame = ttk.Frame(multi_frame)
+        input_frame.pack(pady=5)
+        ttk.Label(input_frame, text="名称:").grid(row=0, column=0)
+        self.named_stopwatch_name = ttk.Entry(input_frame, width=15)
+        self.named_stopwatch_name.grid(row=0, column=1, padx=5)
+        ttk.Button(input_frame, text="添加秒表", 
+                 command=self.add_named_stopwatch).grid(row=0, column=2, padx=10)
+        
+        columns = ('name', 'time', 'status')
+        self.stopwatch_tree = ttk.Treeview(multi_frame, columns=columns, show='headings', height=5)
+        self.stopwatch_tree.heading('name', text='名称')
+        self.stopwatch_tree.heading('time', text='用时')
+        self.stopwatch_tree.heading('status', text='状态')
+        self.stopwatch_tree.column('name', width=150)
+        self.stopwatch_tree.column('time', width=100)
+        self.stopwatch_tree.column('status', width=80)
+        self.stopwatch_tree.pack(expand=True, fill='both', padx=10, pady=5)
+        
+        multi_btn_frame = ttk.Frame(multi_frame)
+        multi_btn_frame.pack(pady=5)
+        ttk.Button(multi_btn_frame, text="开始", 
+                 command=lambda: self.control_selected_stopwatches(self.stopwatches.start)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(multi_btn_frame, text="暂停", 
+                 command=lambda: self.control_selected_stopwatches(self.stopwatches.pause)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(multi_btn_frame, text="重置", 
+                 command=lambda: self.control_selected_stopwatches(self.stopwatches.reset)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(multi_btn_frame, text="删除选中", 
+                 command=self.delete_selected_stopwatches).pack(side=tk.LEFT, padx=5)
+        
+        for slot in self.stopwatches.slots():
+            self.stopwatch_tree.insert("", tk.END, iid=f"sw{slot}", values=self.named_stopwatch_row(slot))
+        self.update_stopwatch_list_view()
+
+    def create_todo_tab(self, todo_frame):
         """创建待办事项标签页"""
-        todo_frame = ttk.Frame(notebook)
-        notebook.add(todo_frame, text="待办事项")
         
         # 输入区域
         input_frame = ttk.LabelFrame(todo_frame, text="添加待办事项")
@@ -474,16 +2012,35 @@ class ClockApp:
         self.todo_end_min.grid(row=0, column=3, padx=2)
         self.todo_end_min.set("00")
         
+        # 时区
+        ttk.Label(input_frame, text="时区:").grid(row=4, column=0, padx=5, pady=5, sticky=tk.W)
+        self.todo_tz = self.create_tz_combobox(input_frame)
+        self.todo_tz.grid(row=4, column=1, padx=5, pady=5, sticky=tk.W)
+        
         # 添加按钮
         add_btn = ttk.Button(input_frame, text="添加待办事项", command=self.add_todo)
-        add_btn.grid(row=4, column=0, columnspan=2, pady=10)
+        add_btn.grid(row=5, column=0, columnspan=2, pady=10)
         
         # 待办事项列表
         list_frame = ttk.LabelFrame(todo_frame, text="待办事项列表")
         list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
+        # 搜索框
+        search_frame = ttk.Frame(list_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="搜索:").pack(side=tk.LEFT, padx=5)
+        self.todo_search_var = tk.StringVar()
+        self.todo_search_after_id = None
+        search_entry = ttk.Entry(search_frame, textvariable=self.todo_search_var, width=30)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<KeyRelease>", lambda e: self.schedule_todo_search())
+        self.todo_search_count = ttk.Label(search_frame, text="")
+        self.todo_search_count.pack(side=tk.LEFT, padx=5)
+        
+        # 待办事项可能非常多, 列表只生成可见的行
         columns = ('title', 'start', 'end', 'status')
-        self.todo_tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=10)
+        self.todo_view = VirtualTreeview(list_frame, columns, self.format_todo_row, height=10)
+        self.todo_tree = self.todo_view.tree
         
         # 设置列
         self.todo_tree.heading('title', text='标题')
@@ -498,11 +2055,11 @@ class ClockApp:
         self.todo_tree.heading('status', text='状态')
         self.todo_tree.column('status', width=100)
         
-        # 添加滚动条
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.todo_tree.yview)
-        self.todo_tree.configure(yscroll=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.todo_tree.pack(fill=tk.BOTH, expand=True)
+        # 时间冲突的待办用红色背景标出
+        self.todo_tree.tag_configure("conflict", background="#ffe0e0")
+        bind_sort_headings(self.todo_tree, self.todo_order, self.update_todo_list)
+        
+        self.todo_view.pack(fill=tk.BOTH, expand=True)
         
         # 控制按钮
         btn_frame = ttk.Frame(todo_frame)
@@ -510,12 +2067,20 @@ class ClockApp:
         
         ttk.Button(btn_frame, text="标记完成", command=self.mark_todo_completed).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="删除选中", command=self.delete_selected_todo).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="编辑选中", command=self.edit_selected_todo).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="查看详情", command=self.view_todo_details).pack(side=tk.LEFT, padx=5)
         
         # 更新待办事项列表
         self.update_todo_list()
 
     def update_main_clock(self):
+        # 比较上次刷新结束到这次刷新之间墙上时钟和单调时钟的变化, 发现休眠或系统时间调整
+        if self.last_tick is not None:
+            last_wall, last_mono, last_boot = self.last_tick
+            wall = time.time()
+            self.check_clock_jump(wall - last_wall, time.monotonic() - last_mono,
+                                  elapsed_clock() - last_boot, last_wall, wall)
+        
         current_time = time.strftime("%H:%M:%S")
         self.main_clock_label.config(text=current_time)
         
@@ -523,11 +2088,81 @@ class ClockApp:
         self.update_timers()
         self.check_alarms()
         self.update_countdowns()
-        self.update_stopwatch()
         self.check_todo_notifications()  # 检查待办事项通知
         
+        # 提醒对话框会阻塞这次刷新, 因此在所有对话框关闭后、安排下次刷新时才记录时刻,
+        # 用户迟迟不关闭对话框不会被误判为时钟不连续
+        self.last_tick = (time.time(), time.monotonic(), elapsed_clock())
         self.root.after(1000, self.update_main_clock)
 
+    def check_clock_jump(self, wall_delta, mono_delta, real_delta, last_wall, wall):
+        """两次刷新之间时钟不连续时, 把这段时间内到期的提醒作为一批处理
+
+        real_delta为elapsed_clock()的变化, 即实际经过的时间。墙上时钟的变化与它相差超过
+        CLOCK_JUMP_SECONDS(系统时间被调整), 或者它超过TICK_GAP_SECONDS(休眠或程序被挂起)时视为不连续。
+        只有实际经过的时间才计入倒计时: 单调时钟在休眠时漏掉的部分从截止时刻中扣除,
+        手动调整系统时间不影响剩余时间, 只按新的墙上时钟重新计算结束时间。
+        """
+        adjusted = wall_delta - real_delta
+        if abs(adjusted) < CLOCK_JUMP_SECONDS and real_delta < TICK_GAP_SECONDS:
+            return
+        slept = max(0.0, real_delta - mono_delta)
+        print(f"检测到时钟不连续: 墙上时钟前进 {wall_delta:.1f} 秒, 实际经过 {real_delta:.1f} 秒"
+              f"(单调时钟漏计 {slept:.1f} 秒), 系统时间调整 {adjusted:+.1f} 秒")
+        
+        now_ns = time.monotonic_ns()
+        now = datetime.fromtimestamp(wall)
+        for timer in list(self.active_timers.values()):
+            timer.deadline_ns -= int(slept * 1_000_000_000)
+            timer.end_time = now + timedelta(microseconds=timer.remaining(now_ns) // 1000)
+            self.update_timer_row(timer)
+        
+        report = reconcile_missed_events(self.timers, self.alarms, self.todos, int(last_wall), int(wall))
+        for timer in report.missed_timers:
+            self.active_timers.pop(timer.uid, None)
+            self.update_timer_row(timer)
+        for alarm in report.missed_alarms:
+            self.update_alarm_row(alarm)
+        if report.missed_todos:
+            self.update_todo_list()
+        if any(report[:3]):
+            self.show_missed_summary(report, f"休眠或系统时间调整期间(约 {max(wall_delta, real_delta) / 60:.0f} 分钟)错过了以下提醒：")
+
+    # 独立窗口管理
+    def open_detached_window(self, key, create_window):
+        """打开实体的独立窗口, 已打开时只把现有窗口提到前台"""
+        window = self.detached_windows.get(key)
+        if window is not None and window.winfo_exists():
+            window.deiconify()
+            window.lift()
+            window.focus_force()
+            return window
+            
+        window = create_window()
+        if not window.winfo_exists():
+            return window
+        self.detached_windows[key] = window
+        
+        def on_destroy(event):
+            # 子控件销毁也会触发绑定在Toplevel上的事件, 这里只处理窗口本身
+            if event.widget is window:
+                self.release_detached_window(key, window)
+                
+        window.bind("<Destroy>", on_destroy, add="+")
+        return window
+
+    def release_detached_window(self, key, window):
+        """窗口关闭后释放注册表项和刷新视图"""
+        if self.detached_windows.get(key) is window:
+            del self.detached_windows[key]
+        self.frame_driver.release(window)
+
+    def close_detached_window(self, key):
+        """实体被删除时关闭其独立窗口"""
+        window = self.detached_windows.get(key)
+        if window is not None and window.winfo_exists():
+            window.destroy()
+
     # 倒计时器相关方法
     def add_timer(self):
         try:
@@ -539,54 +2174,102 @@ class ClockApp:
                 return
             new_timer = CountdownTimer(name, minutes, seconds)
             self.timers.append(new_timer)
-            self.update_timer_list()
+            self.active_timers[new_timer.uid] = new_timer
+            index = self.timer_order.add(new_timer)
+            self.timer_tree.insert("", index, iid=str(new_timer.uid), values=self.timer_row_values(new_timer))
         except ValueError:
             messagebox.showerror("错误", "请输入有效数字")
 
     def update_timers(self):
-        for timer in self.timers:
-            if timer.running:
-                remaining = timer.remaining_time().total_seconds()
-                if remaining <= 0:
-                    timer.running = False
-                    messagebox.showinfo("时间到", f"{timer.name} 倒计时结束！")
-        self.update_timer_list()
+        """每秒只处理计时中的倒计时器"""
+        now_ns = time.monotonic_ns()
+        for timer in list(self.active_timers.values()):
+            remaining = timer.remaining(now_ns)
+            if remaining <= 0:
+                self.expire_timer(timer)
+            elif self.timer_tree.exists(str(timer.uid)):
+                self.timer_tree.set(str(timer.uid), 'time', self.format_timer_remaining(remaining))
 
-    def update_timer_list(self):
-        for item in self.timer_tree.get_children():
-            self.timer_tree.delete(item)
-            
-        for timer in self.timers:
-            if timer.running:
-                remaining = timer.remaining_time().total_seconds()
-                if remaining <= 0:
-                    status = "已结束"
-                    time_str = "00:00"
-                else:
-                    status = "进行中"
-                    mins, secs = divmod(int(remaining), 60)
-                    time_str = f"{mins:02d}:{secs:02d}"
-            else:
-                status = "已结束"
-                time_str = "00:00"
-                
-            self.timer_tree.insert("", tk.END, values=(timer.name, time_str, status))
+    @staticmethod
+    def format_timer_remaining(remaining_ns):
+        # 向上取整, 剩余不足1秒时仍显示00:01
+        mins, secs = divmod(-(-remaining_ns // 1_000_000_000), 60)
+        return f"{mins:02d}:{secs:02d}"
+
+    def timer_row_values(self, timer):
+        if timer.running:
+            status = "进行中"
+        elif timer.paused:
+            status = "已暂停"
+        else:
+            status = "已结束"
+        return (timer.name, self.format_timer_remaining(timer.remaining()), status)
 
-    def stop_selected_timer(self):
+    def update_timer_list(self):
+        """重建倒计时列表, 只在创建标签页时调用"""
+        self.timer_tree.delete(*self.timer_tree.get_children())
+        for timer in self.timer_order.display():
+            self.timer_tree.insert("", tk.END, iid=str(timer.uid), values=self.timer_row_values(timer))
+
+    def update_timer_row(self, timer):
+        """倒计时状态变化后更新这一行, 并按排序键移动到新位置"""
+        index = self.timer_order.update(timer)
+        iid = str(timer.uid)
+        if self.timer_tree.exists(iid):
+            self.timer_tree.item(iid, values=self.timer_row_values(timer))
+            move_tree_row(self.timer_tree, iid, index)
+
+    def pause_timer(self, timer):
+        timer.pause()
+        self.active_timers.pop(timer.uid, None)
+        self.update_timer_row(timer)
+
+    def resume_timer(self, timer):
+        timer.resume()
+        self.active_timers[timer.uid] = timer
+        self.update_timer_row(timer)
+
+    def expire_timer(self, timer):
+        """倒计时结束: 移出计时集合并提醒"""
+        timer.finish()
+        self.active_timers.pop(timer.uid, None)
+        self.update_timer_row(timer)
+        messagebox.showinfo("时间到", f"{timer.name} 倒计时结束！")
+
+    def remove_timer(self, timer):
+        self.timers.remove(timer)
+        self.active_timers.pop(timer.uid, None)
+        self.timer_order.remove(timer)
+        if self.timer_tree.exists(str(timer.uid)):
+            self.timer_tree.delete(str(timer.uid))
+        self.close_detached_window(("timer", timer.uid))
+
+    def selected_timer(self):
         selection = self.timer_tree.selection()
         if selection:
-            index = self.timer_tree.index(selection[0])
-            if 0 <= index < len(self.timers):
-                del self.timers[index]
-                self.update_timer_list()
+            uid = int(selection[0])
+            for timer in self.timers:
+                if timer.uid == uid:
+                    return timer
+        return None
+
+    def stop_selected_timer(self):
+        timer = self.selected_timer()
+        if timer:
+            self.remove_timer(timer)
+
+    def toggle_selected_timer(self):
+        timer = self.selected_timer()
+        if timer:
+            if timer.running:
+                self.pause_timer(timer)
+            else:
+                self.resume_timer(timer)
 
     def open_selected_timer_window(self):
-        selection = self.timer_tree.selection()
-        if selection:
-            index = self.timer_tree.index(selection[0])
-            if 0 <= index < len(self.timers):
-                timer = self.timers[index]
-                self.create_timer_window(timer)
+        timer = self.selected_timer()
+        if timer:
+            self.open_detached_window(("timer", timer.uid), lambda: self.create_timer_window(timer))
 
     def create_timer_window(self, timer):
         window = tk.Toplevel(self.root)
@@ -599,27 +2282,28 @@ class ClockApp:
         time_label = tk.Label(window, text="00:00", font=('Helvetica', 48))
         time_label.pack(pady=20)
         
-        def update_window_timer():
+        def update_window_timer(snapshot):
             if timer.running:
-                remaining = timer.remaining_time().total_seconds()
+                remaining = timer.remaining()
                 if remaining <= 0:
-                    timer.running = False
                     time_label.config(text="00:00")
-                    messagebox.showinfo("时间到", f"{timer.name} 倒计时结束！")
+                    self.expire_timer(timer)
                     window.destroy()
-                    return
-                else:
-                    mins, secs = divmod(int(remaining), 60)
-                    time_label.config(text=f"{mins:02d}:{secs:02d}")
+                    return False
+            time_label.config(text=self.format_timer_remaining(timer.remaining()))
+            stop_btn.config(text="停止" if timer.running else "继续")
+        
+        def toggle_timer():
+            if timer.running:
+                self.pause_timer(timer)
             else:
-                time_label.config(text="00:00")
-                
-            window.after(1000, update_window_timer)
-            
-        update_window_timer()
+                self.resume_timer(timer)
+            update_window_timer(None)
         
-        stop_btn = ttk.Button(window, text="停止", command=lambda: setattr(timer, 'running', False))
+        stop_btn = ttk.Button(window, text="停止", command=toggle_timer)
+        self.frame_driver.register(update_window_timer, 1000, window)
         stop_btn.pack(pady=10)
+        return window
 
     # 闹钟相关方法
     def add_alarm(self):
@@ -632,46 +2316,67 @@ class ClockApp:
                 
             repeat_map = {"不重复": "once", "每天": "daily", "仅周末": "weekend"}
             repeat = repeat_map[self.alarm_repeat.get()]
+            tz = self.parse_tz_choice(self.alarm_tz.get())
+            if tz is False:
+                return
             
-            new_alarm = Alarm(name, hour, minute, repeat)
+            new_alarm = Alarm(name, hour, minute, repeat, tz)
             self.alarms.append(new_alarm)
-            self.update_alarm_list()
+            index = self.alarm_order.add(new_alarm)
+            self.alarm_tree.insert("", index, iid=str(new_alarm.uid), values=self.alarm_row_values(new_alarm))
         except ValueError:
             messagebox.showerror("错误", "请输入有效时间（小时0-23，分钟0-59）")
 
     def check_alarms(self):
+        now_ts = int(time.time())
         for alarm in self.alarms[:]:
-            if alarm.check_and_update():
+            if alarm.check_and_update(now_ts):
                 messagebox.showinfo("闹钟", f"{alarm.name} 时间到了！")
-                self.update_alarm_list()
+                self.update_alarm_row(alarm)
 
-    def update_alarm_list(self):
-        for item in self.alarm_tree.get_children():
-            self.alarm_tree.delete(item)
-            
+    def alarm_row_values(self, alarm):
         repeat_text = {"once": "不重复", "daily": "每天", "weekend": "仅周末"}
-            
-        for alarm in self.alarms:
-            status = "开启" if alarm.active else "关闭"
-            time_str = alarm.alarm_time.strftime("%H:%M")
-            self.alarm_tree.insert("", tk.END, values=(
-                alarm.name, time_str, repeat_text[alarm.repeat], status))
+        status = "开启" if alarm.active else "关闭"
+        time_str = alarm.alarm_time.strftime("%H:%M") + (f" ({alarm.tz})" if alarm.tz else "")
+        return (alarm.name, time_str, repeat_text[alarm.repeat], status)
 
-    def delete_selected_alarm(self):
+    def update_alarm_list(self):
+        self.alarm_tree.delete(*self.alarm_tree.get_children())
+        for alarm in self.alarm_order.display():
+            self.alarm_tree.insert("", tk.END, iid=str(alarm.uid), values=self.alarm_row_values(alarm))
+
+    def update_alarm_row(self, alarm):
+        index = self.alarm_order.update(alarm)
+        iid = str(alarm.uid)
+        if self.alarm_tree is not None and self.alarm_tree.exists(iid):
+            self.alarm_tree.item(iid, values=self.alarm_row_values(alarm))
+            move_tree_row(self.alarm_tree, iid, index)
+
+    def remove_alarm(self, alarm):
+        self.alarms.remove(alarm)
+        self.alarm_order.remove(alarm)
+        if self.alarm_tree is not None and self.alarm_tree.exists(str(alarm.uid)):
+            self.alarm_tree.delete(str(alarm.uid))
+        self.close_detached_window(("alarm", alarm.uid))
+
+    def selected_alarm(self):
         selection = self.alarm_tree.selection()
         if selection:
-            index = self.alarm_tree.index(selection[0])
-            if 0 <= index < len(self.alarms):
-                del self.alarms[index]
-                self.update_alarm_list()
+            uid = int(selection[0])
+            for alarm in self.alarms:
+                if alarm.uid == uid:
+                    return alarm
+        return None
+
+    def delete_selected_alarm(self):
+        alarm = self.selected_alarm()
+        if alarm:
+            self.remove_alarm(alarm)
 
     def open_selected_alarm_window(self):
-        selection = self.alarm_tree.selection()
-        if selection:
-            index = self.alarm_tree.index(selection[0])
-            if 0 <= index < len(self.alarms):
-                alarm = self.alarms[index]
-                self.create_alarm_window(alarm)
+        alarm = self.selected_alarm()
+        if alarm:
+            self.open_detached_window(("alarm", alarm.uid), lambda: self.create_alarm_window(alarm))
 
     def create_alarm_window(self, alarm):
         window = tk.Toplevel(self.root)
@@ -688,15 +2393,15 @@ class ClockApp:
         repeat_label = tk.Label(window, text=f"重复: {repeat_map[alarm.repeat]}")
         repeat_label.pack(pady=5)
         
-        def update_window_alarm():
+        def update_window_alarm(snapshot):
             time_str = alarm.alarm_time.strftime("%H:%M:%S")
             time_label.config(text=time_str)
-            window.after(1000, update_window_alarm)
             
-        update_window_alarm()
+        self.frame_driver.register(update_window_alarm, 1000, window)
         
         stop_btn = ttk.Button(window, text="关闭", command=lambda: setattr(alarm, 'active', False))
         stop_btn.pack(pady=10)
+        return window
 
     # 倒计日相关方法
     def add_countdown(self):
@@ -704,40 +2409,64 @@ class ClockApp:
         name = self.countdown_name.get() or "倒计日"
         try:
             target_date = datetime.strptime(date_str, "%Y-%m-%d")
-            self.countdowns.append(Countdown(name, target_date))
-            self.update_countdown_list()
+            countdown = Countdown(name, target_date)
+            self.countdowns.append(countdown)
+            index = self.countdown_order.add(countdown)
+            self.countdown_tree.insert("", index, iid=str(countdown.uid),
+                                       values=self.countdown_row_values(countdown, datetime.now().date()))
         except ValueError:
             messagebox.showerror("错误", "无效日期格式，请使用YYYY-MM-DD")
 
     def update_countdowns(self):
-        self.update_countdown_list()
-
-    def update_countdown_list(self):
-        for item in self.countdown_tree.get_children():
-            self.countdown_tree.delete(item)
-            
-        now = datetime.now().date()
+        """剩余天数只在日期变化时改变, 跨天时原地更新天数列, 行的顺序不变"""
+        today = datetime.now().date()
+        if self.countdown_tree is None or today == self.countdown_list_date:
+            return
+        self.countdown_list_date = today
         for countdown in self.countdowns:
-            target_date = countdown.target_date.date()
-            delta = (target_date - now).days
-            status = f"剩余 {delta} 天" if delta >=0 else f"已过期 {-delta} 天"
-            self.countdown_tree.insert("", tk.END, values=(countdown.name, status, target_date.strftime("%Y-%m-%d")))
+            if self.countdown_tree.exists(str(countdown.uid)):
+                self.countdown_tree.set(str(countdown.uid), 'days', self.countdown_row_values(countdown, today)[1])
 
-    def delete_selected_countdown(self):
+    @staticmethod
+    def countdown_row_values(countdown, today):
+        target_date = countdown.target_date.date()
+        delta = (target_date - today).days
+        status = f"剩余 {delta} 天" if delta >=0 else f"已过期 {-delta} 天"
+        return (countdown.name, status, target_date.strftime("%Y-%m-%d"))
+
+    def update_countdown_list(self):
+        self.countdown_tree.delete(*self.countdown_tree.get_children())
+        self.countdown_list_date = datetime.now().date()
+        for countdown in self.countdown_order.display():
+            self.countdown_tree.insert("", tk.END, iid=str(countdown.uid),
+                                       values=self.countdown_row_values(countdown, self.countdown_list_date))
+
+    def remove_countdown(self, countdown):
+        self.countdowns.remove(countdown)
+        self.countdown_order.remove(countdown)
+        if self.countdown_tree is not None and self.countdown_tree.exists(str(countdown.uid)):
+            self.countdown_tree.delete(str(countdown.uid))
+        self.close_detached_window(("countdown", countdown.uid))
+
+    def selected_countdown(self):
         selection = self.countdown_tree.selection()
         if selection:
-            index = self.countdown_tree.index(selection[0])
-            if 0 <= index < len(self.countdowns):
-                del self.countdowns[index]
-                self.update_countdown_list()
+            uid = int(selection[0])
+            for countdown in self.countdowns:
+                if countdown.uid == uid:
+                    return countdown
+        return None
+
+    def delete_selected_countdown(self):
+        countdown = self.selected_countdown()
+        if countdown:
+            self.remove_countdown(countdown)
 
     def open_selected_countdown_window(self):
-        selection = self.countdown_tree.selection()
-        if selection:
-            index = self.countdown_tree.index(selection[0])
-            if 0 <= index < len(self.countdowns):
-                countdown = self.countdowns[index]
-                self.create_countdown_window(countdown)
+        countdown = self.selected_countdown()
+        if countdown:
+            self.open_detached_window(("countdown", countdown.uid),
+                                      lambda: self.create_countdown_window(countdown))
 
     def create_countdown_window(self, countdown):
         window = tk.Toplevel(self.root)
@@ -753,44 +2482,144 @@ class ClockApp:
         date_label = tk.Label(window, text=countdown.target_date.strftime("%Y-%m-%d"))
         date_label.pack(pady=5)
         
-        def update_window_countdown():
-            now = datetime.now().date()
+        def update_window_countdown(snapshot):
+            now = snapshot.now.date()
             delta = (countdown.target_date.date() - now).days
             if delta >= 0:
                 status = f"剩余 {delta} 天"
             else:
                 status = f"已过期 {-delta} 天"
             days_label.config(text=status)
-            window.after(86400000, update_window_countdown)  # 每天更新一次
             
-        update_window_countdown()
+        # 每分钟检查一次, 跨过零点后及时更新
+        self.frame_driver.register(update_window_countdown, 60000, window)
+        return window
 
     # 秒表功能
     def start_stopwatch(self):
-        if not self.stopwatch.running:
-            self.stopwatch.start_time = time.time() - self.stopwatch.elapsed_time
-            self.stopwatch.running = True
-
-    def update_stopwatch(self):
-        if self.stopwatch.running:
-            self.stopwatch.elapsed_time = time.time() - self.stopwatch.start_time
-            minutes, seconds = divmod(int(self.stopwatch.elapsed_time), 60)
-            milliseconds = int((self.stopwatch.elapsed_time - int(self.stopwatch.elapsed_time)) * 100)
-            self.stopwatch_label.config(text=f"{minutes:02d}:{seconds:02d}.{milliseconds:02d}")
-        else:
-            minutes, seconds = divmod(int(self.stopwatch.elapsed_time), 60)
-            milliseconds = int((self.stopwatch.elapsed_time - int(self.stopwatch.elapsed_time)) * 100)
-            self.stopwatch_label.config(text=f"{minutes:02d}:{seconds:02d}.{milliseconds:02d}")
+        self.stopwatch.start()
+        self.update_stopwatch_views()
 
     def pause_stopwatch(self):
-        self.stopwatch.running = False
+        self.stopwatch.pause()
+        self.update_stopwatch_views()
 
     def reset_stopwatch(self):
-        self.stopwatch.running = False
-        self.stopwatch.elapsed_time = 0
-        self.stopwatch_label.config(text="00:00.00")
+        self.stopwatch.reset()
+        if self.stopwatch_label is not None:
+            self.stopwatch_label.config(text="00:00.00")
+        self.update_lap_list()
+        self.update_stopwatch_views()
+
+    def lap_stopwatch(self):
+        """计次: 只在秒表运行时记录"""
+        if not self.stopwatch.running:
+            return
+        self.stopwatch.lap()
+        self.update_lap_list(appended=True)
+
+    def update_lap_list(self, appended=False):
+        """更新计次列表; 新增计次时只插入一行"""
+        if self.lap_tree is None:
+            return
+        laps = self.stopwatch.laps
+        if appended:
+            index = len(laps) - 1
+            self.lap_tree.insert("", 0, values=(
+                index + 1, format_stopwatch_time(laps.lap(index)), format_stopwatch_time(laps.splits[index])))
+        else:
+            self.lap_tree.delete(*self.lap_tree.get_children())
+            for index in range(len(laps)):
+                self.lap_tree.insert("", 0, values=(
+                    index + 1, format_stopwatch_time(laps.lap(index)), format_stopwatch_time(laps.splits[index])))
+                
+        if laps.splits:
+            self.lap_stats_label.config(text=(
+                f"最快: {format_stopwatch_time(laps.fastest)}  "
+                f"最慢: {format_stopwatch_time(laps.slowest)}  "
+                f"平均: {format_stopwatch_time(laps.mean())}"))
+        else:
+            self.lap_stats_label.config(text="")
+
+    def register_stopwatch_view(self, callback, widget):
+        """注册显示秒表的视图, 秒表运行时高频刷新, 暂停时降频"""
+        def update_view(snapshot):
+            if not widget.winfo_exists():
+                self.stopwatch_views.discard(view_id)
+                return False
+            callback(snapshot)
+        view_id = self.frame_driver.register(update_view, self.stopwatch_view_interval(), widget)
+        self.stopwatch_views.add(view_id)
+        return view_id
+
+    def stopwatch_view_interval(self):
+        return STOPWATCH_FRAME_MS if self.stopwatch.running else 1000
+
+    def update_stopwatch_views(self):
+        """秒表状态变化时调整所有秒表视图的刷新间隔"""
+        interval = self.stopwatch_view_interval()
+        for view_id in list(self.stopwatch_views):
+            if view_id in self.frame_driver.views:
+                self.frame_driver.set_interval(view_id, interval)
+            else:
+                self.stopwatch_views.discard(view_id)
+
+    def set_stopwatch_text(self, label, snapshot):
+        """按帧快照刷新秒表标签, 文字没变化时不重绘"""
+        text = format_stopwatch_time(self.stopwatch.elapsed(snapshot.mono_ns))
+        if label.cget("text") != text:
+            label.config(text=text)
+
+    # 多秒表
+    def add_named_stopwatch(self):
+        name = self.named_stopwatch_name.get().strip() or f"秒表{len(self.stopwatches) + 1}"
+        slot = self.stopwatches.add(name)
+        self.named_stopwatch_name.delete(0, tk.END)
+        self.stopwatch_tree.insert("", tk.END, iid=f"sw{slot}", values=self.named_stopwatch_row(slot))
+
+    def named_stopwatch_row(self, slot, now_ns=None):
+        status = "运行中" if slot in self.stopwatches.running else "已暂停"
+        return (self.stopwatches.names[slot],
+                format_stopwatch_time(self.stopwatches.elapsed(slot, now_ns)), status)
+
+    def selected_stopwatch_slots(self):
+        return [int(iid[2:]) for iid in self.stopwatch_tree.selection()]
+
+    def control_selected_stopwatches(self, action):
+        """对选中的秒表执行开始/暂停/重置, 只更新对应的行"""
+        for slot in self.selected_stopwatch_slots():
+            action(slot)
+            self.stopwatch_tree.item(f"sw{slot}", values=self.named_stopwatch_row(slot))
+        self.update_stopwatch_list_view()
+
+    def delete_selected_stopwatches(self):
+        for slot in self.selected_stopwatch_slots():
+            self.stopwatches.remove(slot)
+            self.stopwatch_tree.delete(f"sw{slot}")
+        self.update_stopwatch_list_view()
+
+    def update_stopwatch_list_view(self):
+        """有秒表运行时注册一个统一的刷新视图, 全部暂停后注销"""
+        if self.stopwatches.running and self.stopwatch_list_view is None:
+            self.stopwatch_list_view = self.frame_driver.register(
+                self.refresh_running_stopwatches, STOPWATCH_FRAME_MS, self.stopwatch_tree)
+        elif not self.stopwatches.running and self.stopwatch_list_view is not None:
+            self.frame_driver.unregister(self.stopwatch_list_view)
+            self.stopwatch_list_view = None
+
+    def refresh_running_stopwatches(self, snapshot):
+        """只刷新运行中的秒表行"""
+        if not self.stopwatches.running:
+            self.stopwatch_list_view = None
+            return False
+        for slot in self.stopwatches.running:
+            self.stopwatch_tree.set(f"sw{slot}", 'time',
+                                    format_stopwatch_time(self.stopwatches.elapsed(slot, snapshot.mono_ns)))
 
     def open_stopwatch_window(self):
+        self.open_detached_window(("stopwatch", 0), self.create_stopwatch_window)
+
+    def create_stopwatch_window(self):
         window = tk.Toplevel(self.root)
         window.title("秒表")
         window.geometry("300x250")
@@ -801,43 +2630,15 @@ class ClockApp:
         btn_frame = ttk.Frame(window)
         btn_frame.pack(pady=10)
         
-        def start_window_stopwatch():
-            nonlocal running
-            if not running:
-                self.start_stopwatch()
-                running = True
-                update_window_stopwatch()
-
-        def pause_window_stopwatch():
-            nonlocal running
-            self.pause_stopwatch()
-            running = False
-
-        def reset_window_stopwatch():
-            nonlocal running
-            self.reset_stopwatch()
-            running = False
-            stopwatch_label.config(text="00:00.00")
-
-        def update_window_stopwatch():
-            minutes, seconds = divmod(int(self.stopwatch.elapsed_time), 60)
-            milliseconds = int((self.stopwatch.elapsed_time - int(self.stopwatch.elapsed_time)) * 100)
-            stopwatch_label.config(text=f"{minutes:02d}:{seconds:02d}.{milliseconds:02d}")
-            if running:
-                window.after(10, update_window_stopwatch)
-
-        ttk.Button(btn_frame, text="开始", command=start_window_stopwatch).pack(side=tk.LEFT, padx=5)
-        ttk.Button(btn_frame, text="暂停", command=pause_window_stopwatch).pack(side=tk.LEFT, padx=5)
-        ttk.Button(btn_frame, text="重置", command=reset_window_stopwatch).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="开始", command=self.start_stopwatch).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="暂停", command=self.pause_stopwatch).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="重置", command=self.reset_stopwatch).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="计次", command=self.lap_stopwatch).pack(side=tk.LEFT, padx=5)
         
         # 与主窗口秒表同步状态
-        running = self.stopwatch.running
-        if running:
-            update_window_stopwatch()
-        else:
-            minutes, seconds = divmod(int(self.stopwatch.elapsed_time), 60)
-            milliseconds = int((self.stopwatch.elapsed_time - int(self.stopwatch.elapsed_time)) * 100)
-            stopwatch_label.config(text=f"{minutes:02d}:{seconds:02d}.{milliseconds:02d}")
+        self.register_stopwatch_view(
+            lambda snapshot: self.set_stopwatch_text(stopwatch_label, snapshot), window)
+        return window
 
     # ====== 待办事项功能 ======
     def add_todo(self):
@@ -873,10 +2674,14 @@ class ClockApp:
         if end_time <= start_time:
             messagebox.showerror("错误", "结束时间必须晚于开始时间")
             return
+        
+        tz = self.parse_tz_choice(self.todo_tz.get())
+        if tz is False:
+            return
             
         # 创建待办事项
-        new_todo = TodoItem(title, description, start_time, end_time)
-        self.todos.append(new_todo)
+        new_todo = TodoItem(title, description, start_time, end_time, tz=tz)
+        conflicts = self.add_todo_item(new_todo)
         
         # 清空输入框
         self.todo_title.delete(0, tk.END)
@@ -884,57 +2689,206 @@ class ClockApp:
         
         # 更新列表
         self.update_todo_list()
-        messagebox.showinfo("成功", "待办事项已添加")
+        if conflicts:
+            names = "、".join(todo.title for todo in conflicts[:5]) + (" 等" if len(conflicts) > 5 else "")
+            messagebox.showwarning("时间冲突", f"待办事项已添加，但与 {len(conflicts)} 项待办时间重叠：{names}")
+        else:
+            messagebox.showinfo("成功", "待办事项已添加")
+
+    # 待办事项的增删改都经过以下方法, 以便同步维护各个索引
+    def rebuild_todo_indexes(self):
+        self.todo_month_index = TodoMonthIndex(self.todos)
+        self.todo_intervals = TodoIntervalIndex(self.todos)  # 当地时间, 用于日历和日程
+        self.todo_utc_intervals = TodoIntervalIndex(self.todos, todo_utc_span)  # UTC时间, 用于冲突和空闲时间
+        self.busy_intervals = BusyIntervals(self.todo_utc_intervals)
+        self.todo_search = TodoSearchIndex(self.todos)
+        self.todo_order = SortOrder(TODO_SORT_KEYS, self.todos)
+        # 按完成状态分组的待办uid, 用于历史记录的status:筛选
+        self.completed_todos = {todo.uid for todo in self.todos if todo.completed}
+        self.open_todos = {todo.uid for todo in self.todos if not todo.completed}
+        self.todo_conflicts = find_todo_conflicts(self.todos)  # 时间冲突的待办uid
+        self.conflict_month_index = TodoMonthIndex(
+            todo for todo in self.todos if todo.uid in self.todo_conflicts)
+        self.month_models.clear()
+
+    def index_todo(self, todo):
+        """把待办加入各个索引, 返回与它时间重叠的其他未完成待办"""
+        self.month_models.invalidate(self.todo_month_index.add(todo))
+        self.todo_intervals.add(todo)
+        self.todo_utc_intervals.add(todo)
+        self.busy_intervals.invalidate()
+        self.todo_search.add(todo)
+        self.todo_order.add(todo)
+        (self.completed_todos if todo.completed else self.open_todos).add(todo.uid)
+        overlaps = self.todo_overlaps(todo)
+        if overlaps:
+            for other in [todo] + overlaps:
+                self.set_todo_conflict(other, True)
+        return overlaps
+
+    def unindex_todo(self, todo):
+        neighbours = self.todo_overlaps(todo)
+        self.set_todo_conflict(todo, False)
+        self.month_models.invalidate(self.todo_month_index.remove(todo))
+        self.todo_intervals.remove(todo)
+        self.todo_utc_intervals.remove(todo)
+        self.busy_intervals.invalidate()
+        self.todo_search.remove(todo)
+        self.todo_order.remove(todo)
+        self.completed_todos.discard(todo.uid)
+        self.open_todos.discard(todo.uid)
+        # 原来只和这个待办冲突的待办不再冲突; 每个邻居再查一次, 共O(k·(k + 1)·log n)
+        for other in neighbours:
+            if not self.todo_overlaps(other):
+                self.set_todo_conflict(other, False)
+
+    def todo_overlaps(self, todo):
+        """用区间索引找出与待办时间重叠的其他未完成待办, 期望O((k + 1)·log n), k为重叠的待办数"""
+        span = todo_utc_span(todo)
+        if span is None or todo.completed:
+            return []
+        start, end = span
+        index = self.todo_utc_intervals
+        return [other for other in index.find(start, end)
+                if index.spans[other.uid][1] > start and other is not todo and not other.completed]
+
+    def set_todo_conflict(self, todo, conflicted):
+        if conflicted == (todo.uid in self.todo_conflicts):
+            return
+        if conflicted:
+            self.todo_conflicts.add(todo.uid)
+            self.month_models.invalidate(self.conflict_month_index.add(todo))
+        else:
+            self.todo_conflicts.discard(todo.uid)
+            self.month_models.invalidate(self.conflict_month_index.remove(todo))
+
+    def add_todo_item(self, todo):
+        self.todos.append(todo)
+        return self.index_todo(todo)
+
+    def remove_todo_item(self, todo):
+        self.todos.remove(todo)
+        self.unindex_todo(todo)
+
+    def edit_todo_item(self, todo, **changes):
+        """修改待办事项的字段, 先移出索引, 修改后重新加入"""
+        self.unindex_todo(todo)
+        for name, value in changes.items():
+            setattr(todo, name, value)
+        todo.reschedule()
+        self.index_todo(todo)
 
     def update_todo_list(self):
-        """更新待办事项列表"""
-        # 清空当前列表
-        for item in self.todo_tree.get_children():
-            self.todo_tree.delete(item)
-            
-        # 添加所有待办事项
-        for i, todo in enumerate(self.todos):
-            start_str = todo.start_time.strftime("%Y-%m-%d %H:%M") if todo.start_time else "无"
-            end_str = todo.end_time.strftime("%Y-%m-%d %H:%M") if todo.end_time else "无"
+        """更新待办事项列表, 只重新生成可见的行"""
+        if self.todo_view is None:
+            return
+        matches = self.todo_search.search(self.todo_search_var.get())
+        if matches is None:
+            self.todo_view.set_items(self.todo_order.display())
+            self.todo_search_count.config(text="")
+        else:
+            # 只对命中的待办按缓存的排序键排序, 代价与命中数量有关而与待办总数无关
+            self.todo_view.set_items(self.todo_order.ordered(matches))
+            self.todo_search_count.config(text=f"找到 {len(matches)} 项")
+
+    def schedule_todo_search(self):
+        """输入停顿后再搜索, 避免每个按键都刷新列表"""
+        if self.todo_search_after_id is not None:
+            self.root.after_cancel(self.todo_search_after_id)
+        self.todo_search_after_id = self.root.after(150, self.run_todo_search)
+
+    def run_todo_search(self):
+        self.todo_search_after_id = None
+        self.update_todo_list()
+
+    def format_todo_row(self, todo, now):
+        """生成待办事项列表中的一行, 未开始的待办到开始时间后需要重新生成"""
+        start_str = todo.start_time.strftime("%Y-%m-%d %H:%M") if todo.start_time else "无"
+        end_str = todo.end_time.strftime("%Y-%m-%d %H:%M") if todo.end_time else "无"
+        if todo.tz and todo.start_time:
+            start_str += f" ({todo.tz})"
+        
+        status = "已完成" if todo.completed else "进行中"
+        expires = None
+        if todo.start_time and now < todo.local_start():
+            status = "未开始"
+            expires = todo.local_start()
             
-            status = "已完成" if todo.completed else "进行中"
-            if todo.start_time and datetime.now() < todo.start_time:
-                status = "未开始"
-                
-            self.todo_tree.insert("", tk.END, values=(todo.title, start_str, end_str, status), tags=("completed" if todo.completed else "active"))
+        tags = ("completed" if todo.completed else "active",)
+        if todo.uid in self.todo_conflicts:
+            tags += ("conflict",)
+        return (todo.title, start_str, end_str, status), tags, expires
 
     def mark_todo_completed(self):
         """标记选中的待办事项为已完成"""
-        selection = self.todo_tree.selection()
-        if not selection:
-            return
-            
-        index = self.todo_tree.index(selection[0])
-        if 0 <= index < len(self.todos):
-            self.todos[index].completed = True
+        todo = self.todo_view.selected_item()
+        if todo is not None:
+            self.edit_todo_item(todo, completed=True)
             self.update_todo_list()
 
     def delete_selected_todo(self):
         """删除选中的待办事项"""
-        selection = self.todo_tree.selection()
-        if not selection:
+        todo = self.todo_view.selected_item()
+        if todo is not None:
+            self.remove_todo_item(todo)
+            self.todo_view.selected = None
+            self.update_todo_list()
+
+    def edit_selected_todo(self):
+        """编辑选中的待办事项"""
+        todo = self.todo_view.selected_item()
+        if todo is None:
             return
-            
-        index = self.todo_tree.index(selection[0])
-        if 0 <= index < len(self.todos):
-            del self.todos[index]
+        
+        edit_window = tk.Toplevel(self.root)
+        edit_window.title(f"编辑待办事项: {todo.title}")
+        edit_window.geometry("400x250")
+        
+        fields = [
+            ("标题:", todo.title),
+            ("描述:", todo.description),
+            ("开始时间:", todo.start_time.strftime("%Y-%m-%d %H:%M") if todo.start_time else ""),
+            ("结束时间:", todo.end_time.strftime("%Y-%m-%d %H:%M") if todo.end_time else ""),
+        ]
+        entries = []
+        for row, (text, value) in enumerate(fields):
+            ttk.Label(edit_window, text=text).grid(row=row, column=0, padx=5, pady=5, sticky=tk.W)
+            entry = ttk.Entry(edit_window, width=30)
+            entry.grid(row=row, column=1, padx=5, pady=5)
+            entry.insert(0, value)
+            entries.append(entry)
+        title_entry, description_entry, start_entry, end_entry = entries
+        
+        def save():
+            title = title_entry.get().strip()
+            if not title:
+                messagebox.showerror("错误", "标题不能为空", parent=edit_window)
+                return
+            try:
+                start_time = datetime.strptime(start_entry.get().strip(), "%Y-%m-%d %H:%M")
+                end_time = datetime.strptime(end_entry.get().strip(), "%Y-%m-%d %H:%M")
+            except ValueError:
+                messagebox.showerror("错误", "时间格式无效，请使用YYYY-MM-DD HH:MM格式", parent=edit_window)
+                return
+            if end_time <= start_time:
+                messagebox.showerror("错误", "结束时间必须晚于开始时间", parent=edit_window)
+                return
+                
+            self.edit_todo_item(todo, title=title, description=description_entry.get().strip(),
+                                start_time=start_time, end_time=end_time,
+                                notified_start=False, notified_end=False)
             self.update_todo_list()
+            edit_window.destroy()
+            
+        btn_frame = ttk.Frame(edit_window)
+        btn_frame.grid(row=len(fields), column=0, columnspan=2, pady=10)
+        ttk.Button(btn_frame, text="保存", command=save).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="取消", command=edit_window.destroy).pack(side=tk.LEFT, padx=5)
 
     def view_todo_details(self):
         """查看待办事项详情"""
-        selection = self.todo_tree.selection()
-        if not selection:
-            return
-            
-        index = self.todo_tree.index(selection[0])
-        if 0 <= index < len(self.todos):
-            todo = self.todos[index]
-            
+        todo = self.todo_view.selected_item()
+        if todo is not None:
             # 创建详情窗口
             detail_window = tk.Toplevel(self.root)
             detail_window.title(f"待办事项详情: {todo.title}")
@@ -965,7 +2919,7 @@ class ClockApp:
             status_frame.pack(fill=tk.X, padx=10, pady=10)
             tk.Label(status_frame, text="状态:").grid(row=0, column=0, sticky=tk.W, padx=5)
             status_text = "已完成" if todo.completed else "进行中"
-            if todo.start_time and datetime.now() < todo.start_time:
+            if todo.start_time and datetime.now() < todo.local_start():
                 status_text = "未开始"
             tk.Label(status_frame, text=status_text, fg="green" if todo.completed else "blue").grid(row=0, column=1, sticky=tk.W)
             
@@ -973,115 +2927,184 @@ class ClockApp:
             ttk.Button(detail_window, text="关闭", command=detail_window.destroy).pack(pady=10)
 
     def check_todo_notifications(self):
-        """检查待办事项通知"""
-        now = datetime.now()
+        """检查待办事项通知, 按UTC时间戳比较"""
+        now_ts = int(time.time())
         
         for todo in self.todos:
             if todo.completed:
                 continue
                 
             # 检查开始时间通知
-            if todo.start_time and not todo.notified_start:
+            if todo.start_at is not None and not todo.notified_start:
                 # 提前5分钟通知
-                if now >= todo.start_time - timedelta(minutes=5) and now < todo.start_time:
+                if todo.start_at - 300 <= now_ts < todo.start_at:
                     messagebox.showinfo("待办事项即将开始", 
                                       f"待办事项 '{todo.title}' 即将在5分钟后开始！\n"
                                       f"开始时间: {todo.start_time.strftime('%Y-%m-%d %H:%M')}")
                     todo.notified_start = True
                     
                 # 到开始时间通知
-                elif now >= todo.start_time and now < todo.start_time + timedelta(minutes=1):
+                elif todo.start_at <= now_ts < todo.start_at + 60:
                     messagebox.showinfo("待办事项已开始", 
                                       f"待办事项 '{todo.title}' 已开始！\n"
                                       f"开始时间: {todo.start_time.strftime('%Y-%m-%d %H:%M')}")
                     todo.notified_start = True
             
             # 检查结束时间通知
-            if todo.end_time and not todo.notified_end:
+            if todo.end_at is not None and not todo.notified_end:
                 # 提前5分钟通知
-                if now >= todo.end_time - timedelta(minutes=5) and now < todo.end_time:
+                if todo.end_at - 300 <= now_ts < todo.end_at:
                     messagebox.showinfo("待办事项即将结束", 
                                       f"待办事项 '{todo.title}' 即将在5分钟后结束！\n"
                                       f"结束时间: {todo.end_time.strftime('%Y-%m-%d %H:%M')}")
                     todo.notified_end = True
                     
                 # 到结束时间通知
-                elif now >= todo.end_time and now < todo.end_time + timedelta(minutes=1):
+                elif todo.end_at <= now_ts < todo.end_at + 60:
                     messagebox.showinfo("待办事项已结束", 
                                       f"待办事项 '{todo.title}' 已结束！\n"
                                       f"结束时间: {todo.end_time.strftime('%Y-%m-%d %H:%M')}")
                     todo.notified_end = True
 
     # ====== 世界时钟功能 ======
+    # 常用时区及其中文名称
+    COMMON_TIMEZONES = [
+        ("UTC", "UTC"),
+        ("伦敦", "Europe/London"),
+        ("纽约", "America/New_York"),
+        ("洛杉矶", "America/Los_Angeles"),
+        ("东京", "Asia/Tokyo"),
+        ("悉尼", "Australia/Sydney"),
+        ("巴黎", "Europe/Paris"),
+        ("柏林", "Europe/Berlin"),
+        ("莫斯科", "Europe/Moscow"),
+        ("北京", "Asia/Shanghai"),
+        ("新加坡", "Asia/Singapore"),
+        ("迪拜", "Asia/Dubai"),
+        ("孟买", "Asia/Kolkata")
+    ]
+
+    LOCAL_TZ_CHOICE = "本机时区"
+
+    def create_tz_combobox(self, parent):
+        """时区选择框: 默认本机时区, 可选常用时区, 也可以直接输入时区名"""
+        combobox = ttk.Combobox(parent, values=[self.LOCAL_TZ_CHOICE] + [zone for _, zone in self.COMMON_TIMEZONES],
+                                width=18)
+        combobox.set(self.LOCAL_TZ_CHOICE)
+        return combobox
+
+    def parse_tz_choice(self, text):
+        """返回选择的时区名, 本机时区为None; 时区无效时提示并返回False"""
+        text = text.strip()
+        if not text or text == self.LOCAL_TZ_CHOICE:
+            return None
+        try:
+            tz_service.get_zone(text)
+        except tz_service.UnknownTimeZoneError:
+            messagebox.showerror("错误", f"无效时区: {text}")
+            return False
+        return text
+
     def show_world_clock(self):
-        """显示世界时钟窗口"""
+        """显示世界时钟面板, 同时显示多个时区
+
+        每个窗口的时区列表各自独立; 每秒只取一次UTC时间戳, 各时区在预先计算的切换表中
+        查到偏移量后相加得到当地时间。
+        """
         world_clock_window = tk.Toplevel(self.root)
         world_clock_window.title("世界时钟")
-        world_clock_window.geometry("400x300")
+        world_clock_window.geometry("560x420")
         
-        # 时区选择
-        tz_frame = ttk.LabelFrame(world_clock_window, text="选择时区")
-        tz_frame.pack(fill=tk.X, padx=10, pady=10)
-        
-        # 常用时区列表
-        common_timezones = [
-            ("UTC", "UTC"),
-            ("伦敦", "Europe/London"),
-            ("纽约", "America/New_York"),
-            ("洛杉矶", "America/Los_Angeles"),
-            ("东京", "Asia/Tokyo"),
-            ("悉尼", "Australia/Sydney"),
-            ("巴黎", "Europe/Paris"),
-            ("柏林", "Europe/Berlin"),
-            ("莫斯科", "Europe/Moscow"),
-            ("北京", "Asia/Shanghai"),
-            ("新加坡", "Asia/Singapore"),
-            ("迪拜", "Asia/Dubai"),
-            ("孟买", "Asia/Kolkata")
-        ]
+        zone_names = {zone: name for name, zone in self.COMMON_TIMEZONES}
         
-        self.selected_tz = tk.StringVar(value=common_timezones[0][1])
-        
-        # 创建时区选择下拉框
-        tz_combobox = ttk.Combobox(tz_frame, textvariable=self.selected_tz, state="readonly")
-        tz_combobox['values'] = [tz[1] for tz in common_timezones]
-        tz_combobox.pack(padx=10, pady=5, fill=tk.X)
-        
-        # 时间显示
-        time_frame = ttk.Frame(world_clock_window)
-        time_frame.pack(pady=20)
+        # 时区选择: 在完整的时区数据库中搜索
+        tz_frame = ttk.LabelFrame(world_clock_window, text="添加时区")
+        tz_frame.pack(fill=tk.X, padx=10, pady=10)
         
-        self.world_time_label = tk.Label(time_frame, font=('Helvetica', 24))
-        self.world_time_label.pack()
+        search_var = tk.StringVar()
+        search_entry = ttk.Entry(tz_frame, textvariable=search_var)
+        search_entry.pack(padx=10, pady=5, fill=tk.X)
+        
+        picker_frame = ttk.Frame(tz_frame)
+        picker_frame.pack(padx=10, pady=5, fill=tk.X)
+        zone_listbox = tk.Listbox(picker_frame, height=5)
+        picker_scrollbar = ttk.Scrollbar(picker_frame, orient=tk.VERTICAL, command=zone_listbox.yview)
+        zone_listbox.configure(yscrollcommand=picker_scrollbar.set)
+        picker_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        zone_listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        all_zones = tz_service.all_zones()
+        
+        def filter_zones(event=None):
+            # 按时区名或中文名称的子串过滤
+            text = search_var.get().strip().lower()
+            zone_listbox.delete(0, tk.END)
+            for zone in all_zones:
+                if text in zone.lower() or text in zone_names.get(zone, ""):
+                    zone_listbox.insert(tk.END, zone)
+        
+        search_entry.bind("<KeyRelease>", filter_zones)
+        filter_zones()
+        
+        # 时区列表
+        list_frame = ttk.Frame(world_clock_window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        columns = ('name', 'time', 'date', 'offset')
+        zone_tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=8)
+        zone_tree.heading('name', text='时区')
+        zone_tree.heading('time', text='时间')
+        zone_tree.heading('date', text='日期')
+        zone_tree.heading('offset', text='UTC偏移')
+        zone_tree.column('name', width=180)
+        zone_tree.column('time', width=90)
+        zone_tree.column('date', width=160)
+        zone_tree.column('offset', width=80)
+        zone_tree.pack(fill=tk.BOTH, expand=True)
+        
+        clocks = {}  # 本窗口显示的时区 -> tz_service.ZoneTable
+        
+        def add_zone(zone):
+            if zone in clocks:
+                return
+            try:
+                clocks[zone] = tz_service.get_zone(zone)
+            except tz_service.UnknownTimeZoneError:
+                messagebox.showerror("错误", f"无效时区: {zone}\n(Windows上需要先安装tzdata包)", parent=world_clock_window)
+                return
+            label = f"{zone_names[zone]} ({zone})" if zone in zone_names else zone
+            zone_tree.insert("", tk.END, iid=zone, values=(label, "", "", ""))
+            update_zones(None)
+        
+        def add_selected_zone():
+            for index in zone_listbox.curselection():
+                add_zone(zone_listbox.get(index))
+        
+        def remove_selected_zones():
+            for zone in zone_tree.selection():
+                del clocks[zone]
+                zone_tree.delete(zone)
+        
+        def update_zones(snapshot):
+            ts = int(snapshot.wall if snapshot else time.time())
+            for zone, clock in clocks.items():
+                offset = clock.utc_offset(ts)
+                local = LOCAL_EPOCH + timedelta(seconds=ts + offset)
+                hours, minutes = divmod(abs(offset) // 60, 60)
+                sign = "-" if offset < 0 else "+"
+                zone_tree.item(zone, values=(zone_tree.set(zone, 'name'), local.strftime("%H:%M:%S"),
+                                             local.strftime("%Y-%m-%d %A"), f"{sign}{hours:02d}:{minutes:02d}"))
+        
+        zone_listbox.bind("<Double-Button-1>", lambda e: add_selected_zone())
+        btn_frame = ttk.Frame(tz_frame)
+        btn_frame.pack(pady=5)
+        ttk.Button(btn_frame, text="添加", command=add_selected_zone).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="删除选中", command=remove_selected_zones).pack(side=tk.LEFT, padx=5)
         
-        self.world_date_label = tk.Label(time_frame, font=('Helvetica', 14))
-        self.world_date_label.pack(pady=5)
+        for zone in ("UTC", "Asia/Shanghai", "Europe/London", "America/New_York"):
+            add_zone(zone)
         
         # 更新世界时钟
-        self.update_world_clock()
-        
-        # 设置定时器持续更新
-        def update_clock():
-            self.update_world_clock()
-            world_clock_window.after(1000, update_clock)
-            
-        update_clock()
-
-    def update_world_clock(self):
-        """更新世界时钟显示"""
-        try:
-            # 获取选定时区
-            tz = pytz.timezone(self.selected_tz.get())
-            
-            # 获取该时区的当前时间
-            now = datetime.now(tz)
-            
-            # 更新时间显示
-            self.world_time_label.config(text=now.strftime("%H:%M:%S"))
-            self.world_date_label.config(text=now.strftime("%Y-%m-%d %A"))
-        except pytz.UnknownTimeZoneError:
-            self.world_time_label.config(text="无效时区")
-            self.world_date_label.config(text="")
+        self.frame_driver.register(update_zones, 1000, world_clock_window)
 
     # ====== 日历功能 ======
     def show_calendar(self):
@@ -1123,22 +3146,21 @@ class ClockApp:
         today_btn = ttk.Button(nav_frame, text="今天", command=lambda: self.go_to_today(calendar_window))
         today_btn.pack(side=tk.RIGHT, padx=10)
         
+        # 年视图按钮
+        year_btn = ttk.Button(nav_frame, text="年视图", command=lambda: self.show_year_view(calendar_window))
+        year_btn.pack(side=tk.RIGHT, padx=2)
+        
         # 日历显示区域
         self.calendar_frame = ttk.Frame(calendar_window)
         self.calendar_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
         # 初始化日历
+        self.create_calendar_cells(calendar_window)
         self.update_calendar(calendar_window)
 
     def change_calendar_month(self, delta, window):
         """改变日历显示的月份"""
-        self.current_month += delta
-        if self.current_month > 12:
-            self.current_month = 1
-            self.current_year += 1
-        elif self.current_month < 1:
-            self.current_month = 12
-            self.current_year -= 1
+        self.current_year, self.current_month = shift_month(self.current_year, self.current_month, delta)
             
         self.calendar_header.config(text=f"{self.current_year}年 {self.current_month}月")
         self.update_calendar(window)
@@ -1151,83 +3173,375 @@ class ClockApp:
         self.calendar_header.config(text=f"{self.current_year}年 {self.current_month}月")
         self.update_calendar(window)
 
-    def update_calendar(self, window):
-        """更新日历显示"""
-        # 清除现有日历
-        for widget in self.calendar_frame.winfo_children():
-            widget.destroy()
-            
-        # 创建星期标题
+    def create_calendar_cells(self, window):
+        """创建日历网格的单元格池: 7个星期标题和6x7个日期格子, 翻页时只修改其内容"""
         weekdays = ["一", "二", "三", "四", "五", "六", "日"]
         for i, day in enumerate(weekdays):
             label = tk.Label(self.calendar_frame, text=day, width=10, height=2, 
                            relief=tk.RIDGE, bg="#f0f0f0")
             label.grid(row=0, column=i, sticky="nsew")
             
-        # 获取当月的日历
-        cal = calendar.monthcalendar(self.current_year, self.current_month)
-        
-        # 获取有todo的日期
-        todo_dates = set()
-        for todo in self.todos:
-            if todo.start_time:
-                if todo.start_time.year == self.current_year and todo.start_time.month == self.current_month:
-                    todo_dates.add(todo.start_time.day)
-            if todo.end_time:
-                if todo.end_time.year == self.current_year and todo.end_time.month == self.current_month:
-                    todo_dates.add(todo.end_time.day)
+        self.calendar_cells = []
+        self.calendar_cell_days = [0] * 42  # 每个格子当前显示的日期, 0表示不在当前月
+        for index in range(42):
+            label = tk.Label(self.calendar_frame, text="", width=10, height=3, 
+                           relief=tk.RIDGE, bg="#f8f8f8")
+            label.grid(row=index // 7 + 1, column=index % 7, sticky="nsew")
+            # 点击时根据格子当前的日期显示待办事项
+            label.bind("<Button-1>", lambda e, i=index: self.on_calendar_cell_click(i, window))
+            self.calendar_cells.append(label)
+            
+        # 设置网格权重，使日历单元格均匀分布
+        for i in range(7):
+            self.calendar_frame.columnconfigure(i, weight=1)
+        for i in range(6):  # 最多6行
+            self.calendar_frame.rowconfigure(i+1, weight=1)
+
+    def on_calendar_cell_click(self, index, window):
+        day = self.calendar_cell_days[index]
+        if day:
+            self.show_day_todos(day, window)
+
+    def build_month_model(self, year, month):
+        """计算某月的日历网格和有待办的日期"""
+        import calendar
+        return MonthModel(calendar.monthcalendar(year, month), self.todo_month_index.days(year, month),
+                          self.conflict_month_index.days(year, month))
+
+    def prefetch_adjacent_months(self):
+        """空闲时预先计算当前月前后两个月的视图模型"""
+        self.calendar_prefetch_id = None
+        for delta in (1, -1):
+            self.month_models.prefetch(*shift_month(self.current_year, self.current_month, delta))
+
+    def update_calendar(self, window):
+        """更新日历显示, 复用已有的单元格, 不创建新控件"""
+        # 获取当月的日历和有todo的日期
+        model = self.month_models.get(self.current_year, self.current_month)
+        cal = model.weeks
+        todo_dates = model.todo_days
+        conflict_dates = model.conflict_days
+        
+        # 今天的日期只取一次
+        now = datetime.now()
+        today = now.day if (self.current_year, self.current_month) == (now.year, now.month) else 0
         
         # 填充日历
-        for week_num, week in enumerate(cal):
-            for day_num, day in enumerate(week):
+        for week_num in range(6):
+            week = cal[week_num] if week_num < len(cal) else None
+            for day_num in range(7):
+                index = week_num * 7 + day_num
+                label = self.calendar_cells[index]
+                if week is None:
+                    # 本月没有这一周, 隐藏整行
+                    self.calendar_cell_days[index] = 0
+                    label.grid_remove()
+                    continue
+                    
+                day = week[day_num]
+                self.calendar_cell_days[index] = day
                 if day == 0:
                     # 不在当前月的日期
-                    label = tk.Label(self.calendar_frame, text="", width=10, height=3, 
-                                   relief=tk.RIDGE, bg="#f8f8f8")
+                    label.config(text="", bg="#f8f8f8", fg="#000000")
                 else:
-                    # 当前月的日期
-                    bg_color = "#ffffff"
-                    fg_color = "#000000"
-                    
-                    # 如果是今天，高亮显示
-                    now = datetime.now()
-                    if (day == now.day and 
-                        self.current_month == now.month and 
-                        self.current_year == now.year):
-                        bg_color = "#e6f7ff"
+                    # 当前月的日期, 今天高亮显示, 有冲突的日期用红色背景
+                    bg_color = "#e6f7ff" if day == today else "#ffffff"
+                    if day in conflict_dates:
+                        bg_color = "#ffe0e0"
                     
                     # 如果有待办事项，添加标记
-                    todo_marker = ""
                     if day in todo_dates:
-                        todo_marker = " ●"
-                        fg_color = "#ff0000"
-                    
-                    label = tk.Label(self.calendar_frame, text=f"{day}{todo_marker}", 
-                                   width=10, height=3, relief=tk.RIDGE,
-                                   bg=bg_color, fg=fg_color)
-                    
-                    # 添加点击事件
-                    label.bind("<Button-1>", lambda e, d=day: self.show_day_todos(d, window))
-                    
-                label.grid(row=week_num+1, column=day_num, sticky="nsew")
+                        label.config(text=f"{day} ●", bg=bg_color, fg="#ff0000")
+                    else:
+                        label.config(text=str(day), bg=bg_color, fg="#000000")
+                label.grid()
                 
-        # 设置网格权重，使日历单元格均匀分布
-        for i in range(7):
-            self.calendar_frame.columnconfigure(i, weight=1)
-        for i in range(6):  # 最多6行
-            self.calendar_frame.rowconfigure(i+1, weight=1)
+        # 连续翻页时只保留最后一次预取
+        if self.calendar_prefetch_id is not None:
+            self.root.after_cancel(self.calendar_prefetch_id)
+        self.calendar_prefetch_id = self.root.after_idle(self.prefetch_adjacent_months)
+
+    def show_year_view(self, calendar_window):
+        """显示一年中每天待办数量的热力图"""
+        year_window = tk.Toplevel(calendar_window)
+        year_window.title("年视图")
+        year_window.geometry("860x260")
+        
+        cell, gap, left, top = 13, 2, 30, 25
+        pitch = cell + gap
+        colors = ["#ebedf0", "#c6e48b", "#7bc96f", "#239a3b", "#196127"]
+        year = self.current_year
+        density = []
+        
+        nav_frame = ttk.Frame(year_window)
+        nav_frame.pack(fill=tk.X, padx=10, pady=5)
+        header = tk.Label(nav_frame, font=("Helvetica", 14))
+        info_label = ttk.Label(year_window, text="")
+        canvas = tk.Canvas(year_window, width=left + 54 * pitch, height=top + 7 * pitch, 
+                         bg="#ffffff", highlightthickness=0)
+        
+        def day_at(x, y):
+            """根据坐标找到对应的日期, 不在格子上时返回None"""
+            column, row = (x - left) // pitch, (y - top) // pitch
+            if x < left or y < top or row > 6:
+                return None
+            offset = column * 7 + row - datetime(year, 1, 1).weekday()
+            if not 0 <= offset < len(density):
+                return None
+            return datetime(year, 1, 1) + timedelta(days=offset)
+        
+        def draw():
+            nonlocal density
+            header.config(text=f"{year}年")
+            density = year_todo_density(*self.todo_intervals.bounds(), year)
+            peak = max(density) if density else 0
+            
+            canvas.delete("all")
+            for row, name in enumerate(["一", "三", "五", "日"]):
+                canvas.create_text(left - 15, top + (row * 2) * pitch + cell // 2, text=name, fill="#666666")
+            first_weekday = datetime(year, 1, 1).weekday()
+            for offset, count in enumerate(density):
+                position = offset + first_weekday
+                column, row = divmod(position, 7)
+                x, y = left + column * pitch, top + row * pitch
+                level = 0 if count == 0 else 1 + min(3, (count - 1) * 4 // max(peak, 1))
+                canvas.create_rectangle(x, y, x + cell, y + cell, fill=colors[level], width=0)
+                day = datetime(year, 1, 1) + timedelta(days=offset)
+                if day.day == 1:
+                    canvas.create_text(x, top - 12, text=f"{day.month}月", anchor=tk.W, fill="#666666")
+        
+        def change_year(delta):
+            nonlocal year
+            year += delta
+            draw()
+        
+        def on_motion(event):
+            day = day_at(event.x, event.y)
+            if day is None:
+                info_label.config(text="")
+            else:
+                count = density[(day - datetime(year, 1, 1)).days]
+                info_label.config(text=f"{day.strftime('%Y-%m-%d')}: {count} 项待办")
+        
+        def on_click(event):
+            day = day_at(event.x, event.y)
+            if day is None or not calendar_window.winfo_exists():
+                return
+            # 日历跳到所点的月份并显示当天的待办事项
+            self.current_year, self.current_month = day.year, day.month
+            self.calendar_header.config(text=f"{self.current_year}年 {self.current_month}月")
+            self.update_calendar(calendar_window)
+            self.show_day_todos(day.day, calendar_window)
+        
+        ttk.Button(nav_frame, text="<", width=5, command=lambda: change_year(-1)).pack(side=tk.LEFT, padx=2)
+        header.pack(side=tk.LEFT, expand=True)
+        ttk.Button(nav_frame, text=">", width=5, command=lambda: change_year(1)).pack(side=tk.RIGHT, padx=2)
+        canvas.pack(padx=10, pady=5)
+        info_label.pack(pady=5)
+        canvas.bind("<Motion>", on_motion)
+        canvas.bind("<Button-1>", on_click)
+        draw()
+
+    # ====== 日程功能 ======
+    def show_agenda(self):
+        """显示未来N天将要开始的待办事项
+
+        待办保存在按开始时间排序的区间索引(树堆)里, 每页用TodoIntervalIndex.starting_between
+        从上一页结束处按顺序遍历树, 只读取一页; 列表滚动到底部附近时才加载下一页,
+        不会一次生成全部未来的条目。
+        """
+        agenda_window = tk.Toplevel(self.root)
+        agenda_window.title("日程")
+        agenda_window.geometry("600x450")
+        
+        page_size = 100
+        
+        top_frame = ttk.Frame(agenda_window)
+        top_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Label(top_frame, text="未来天数:").pack(side=tk.LEFT)
+        days_spinbox = ttk.Spinbox(top_frame, from_=1, to=3650, width=5)
+        days_spinbox.set("7")
+        days_spinbox.pack(side=tk.LEFT, padx=5)
+        
+        list_frame = ttk.Frame(agenda_window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        columns = ('date', 'time', 'title', 'status')
+        agenda_tree = ttk.Treeview(list_frame, columns=columns, show='headings')
+        agenda_tree.heading('date', text='日期')
+        agenda_tree.heading('time', text='时间')
+        agenda_tree.heading('title', text='标题')
+        agenda_tree.heading('status', text='状态')
+        agenda_tree.column('date', width=100)
+        agenda_tree.column('time', width=100)
+        agenda_tree.column('title', width=250)
+        agenda_tree.column('status', width=80)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=agenda_tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        agenda_tree.pack(fill=tk.BOTH, expand=True)
+        
+        count_label = ttk.Label(agenda_window, text="")
+        count_label.pack(pady=5)
+        
+        # 读取位置: 下一页从开始时间cursor_start处开始, 跳过已读的cursor_skip个同一开始时间的条目;
+        # pending表示已安排加载下一页, 与PagedTreeLoader一样避免连续滚动时重复安排
+        state = {"lo": 0, "hi": 0, "cursor_start": 0, "cursor_skip": 0, "done": True, "loaded": 0,
+                 "pending": False}
+        
+        def load_page():
+            state["pending"] = False
+            if state["done"]:
+                return
+            todos = self.todo_intervals.starting_between(
+                state["cursor_start"], state["hi"], state["cursor_skip"], page_size)
+            for todo in todos:
+                start_time = todo.start_time or todo.end_time
+                end_str = todo.end_time.strftime("%H:%M") if todo.end_time else ""
+                status = "已完成" if todo.completed else "未开始"
+                agenda_tree.insert("", tk.END, values=(
+                    start_time.strftime("%Y-%m-%d"),
+                    f"{start_time.strftime('%H:%M')}-{end_str}",
+                    todo.title, status))
+            if todos:
+                last_start = todo_span(todos[-1])[0]
+                same = sum(1 for todo in todos if todo_span(todo)[0] == last_start)
+                if last_start == state["cursor_start"]:
+                    same += state["cursor_skip"]
+                state["cursor_start"], state["cursor_skip"] = last_start, same
+            state["loaded"] += len(todos)
+            state["done"] = len(todos) < page_size
+            count_label.config(text=f"已加载 {state['loaded']} 项" + ("" if state["done"] else "，滚动加载更多"))
+        
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            # 接近底部时加载下一页
+            if float(last) > 0.9 and not state["done"] and not state["pending"]:
+                state["pending"] = True
+                agenda_window.after_idle(load_page)
+        
+        def refresh():
+            try:
+                days = int(days_spinbox.get())
+            except ValueError:
+                messagebox.showerror("错误", "请输入有效天数", parent=agenda_window)
+                return
+            now = datetime.now()
+            state.update(lo=naive_seconds(now), hi=naive_seconds(now + timedelta(days=days)),
+                         cursor_start=naive_seconds(now), cursor_skip=0, done=False, loaded=0)
+            agenda_tree.delete(*agenda_tree.get_children())
+            load_page()
+        
+        agenda_tree.configure(yscrollcommand=on_scroll)
+        ttk.Button(top_frame, text="刷新", command=refresh).pack(side=tk.LEFT, padx=5)
+        days_spinbox.bind("<Return>", lambda e: refresh())
+        refresh()
+
+    # ====== 空闲时间 ======
+    def show_free_time_finder(self):
+        """在日期范围内查找没有未完成待办占用的时间段, 并可直接预约为待办事项"""
+        finder_window = tk.Toplevel(self.root)
+        finder_window.title("查找空闲时间")
+        finder_window.geometry("550x450")
+        
+        input_frame = ttk.Frame(finder_window)
+        input_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(input_frame, text="时长(分钟):").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
+        duration_entry = ttk.Entry(input_frame, width=8)
+        duration_entry.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
+        duration_entry.insert(0, "60")
+        
+        today = datetime.now().strftime("%Y-%m-%d")
+        ttk.Label(input_frame, text="从 (YYYY-MM-DD):").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+        from_entry = ttk.Entry(input_frame, width=12)
+        from_entry.grid(row=1, column=1, padx=5, pady=5, sticky=tk.W)
+        from_entry.insert(0, today)
+        
+        ttk.Label(input_frame, text="到 (YYYY-MM-DD):").grid(row=1, column=2, padx=5, pady=5, sticky=tk.W)
+        to_entry = ttk.Entry(input_frame, width=12)
+        to_entry.grid(row=1, column=3, padx=5, pady=5, sticky=tk.W)
+        to_entry.insert(0, (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d"))
+        
+        columns = ('start', 'end', 'length')
+        slot_tree = ttk.Treeview(finder_window, columns=columns, show='headings', height=12)
+        slot_tree.heading('start', text='开始')
+        slot_tree.heading('end', text='结束')
+        slot_tree.heading('length', text='空闲时长')
+        slot_tree.column('start', width=160)
+        slot_tree.column('end', width=160)
+        slot_tree.column('length', width=100)
+        slot_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        found = {}  # 行iid -> 空闲时间段开始的datetime
+        search = {"duration": 0}
+        
+        def find():
+            try:
+                duration = int(duration_entry.get())
+                range_start = datetime.strptime(from_entry.get().strip(), "%Y-%m-%d")
+                range_end = datetime.strptime(to_entry.get().strip(), "%Y-%m-%d") + timedelta(days=1)
+                if duration <= 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("错误", "请输入有效的时长和日期", parent=finder_window)
+                return
+            # 不推荐已经过去的时间, 开始时间取整到下一分钟
+            now = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=1)
+            range_start = max(range_start, now)
+            
+            search["duration"] = duration
+            slot_tree.delete(*slot_tree.get_children())
+            found.clear()
+            # 忙碌区间按UTC时间保存, 输入和结果按本机时区换算
+            slots = self.busy_intervals.free_slots(
+                wall_to_utc(range_start), wall_to_utc(range_end), duration * 60)
+            for start, end in slots:
+                start_time = datetime.fromtimestamp(start)
+                end_time = datetime.fromtimestamp(end)
+                hours, minutes = divmod((end - start) // 60, 60)
+                iid = slot_tree.insert("", tk.END, values=(
+                    start_time.strftime("%Y-%m-%d %H:%M"), end_time.strftime("%Y-%m-%d %H:%M"),
+                    f"{hours}小时{minutes}分钟"))
+                found[iid] = start_time
+            if not slots:
+                messagebox.showinfo("查找空闲时间", "该时间范围内没有足够长的空闲时间", parent=finder_window)
+        
+        def book():
+            selection = slot_tree.selection()
+            if not selection:
+                return
+            title = simpledialog.askstring("预约", "待办事项标题:", parent=finder_window)
+            if not title:
+                return
+            start_time = found[selection[0]]
+            end_time = start_time + timedelta(minutes=search["duration"])
+            # 填入待办事项表单, 走原有的添加流程
+            self.ensure_main_tab(self.create_todo_tab)
+            for entry, value in ((self.todo_title, title), (self.todo_description, ""),
+                                 (self.todo_start_date, start_time.strftime("%Y-%m-%d")),
+                                 (self.todo_end_date, end_time.strftime("%Y-%m-%d"))):
+                entry.delete(0, tk.END)
+                entry.insert(0, value)
+            self.todo_start_hour.set(f"{start_time.hour:02d}")
+            self.todo_start_min.set(f"{start_time.minute:02d}")
+            self.todo_end_hour.set(f"{end_time.hour:02d}")
+            self.todo_end_min.set(f"{end_time.minute:02d}")
+            self.todo_tz.set(self.LOCAL_TZ_CHOICE)
+            self.add_todo()
+            find()
+        
+        btn_frame = ttk.Frame(finder_window)
+        btn_frame.pack(pady=10)
+        ttk.Button(input_frame, text="查找", command=find).grid(row=0, column=3, padx=5, pady=5)
+        ttk.Button(btn_frame, text="预约选中", command=book).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="关闭", command=finder_window.destroy).pack(side=tk.LEFT, padx=5)
+        find()
 
     def show_day_todos(self, day, parent_window):
         """显示某一天的待办事项"""
-        # 获取该日期的所有待办事项
-        day_todos = []
+        # 获取该日期的所有待办事项, 包括跨越这一天的
         target_date = datetime(self.current_year, self.current_month, day)
-        
-        for todo in self.todos:
-            # 检查开始或结束时间是否匹配
-            if (todo.start_time and todo.start_time.date() == target_date.date()) or \
-               (todo.end_time and todo.end_time.date() == target_date.date()):
-                day_todos.append(todo)
+        day_todos = self.todo_intervals.on_day(target_date)
                 
         if not day_todos:
             messagebox.showinfo("待办事项", f"{target_date.strftime('%Y-%m-%d')} 没有待办事项")
@@ -1275,9 +3589,11 @@ class ClockApp:
                 if time_str:
                     time_str += "\n"
                 time_str += f"结束: {todo.end_time.strftime('%H:%M')}"
+            if not time_str:
+                time_str = "全天"
                 
             status = "已完成" if todo.completed else "进行中"
-            if todo.start_time and datetime.now() < todo.start_time:
+            if todo.start_time and datetime.now() < todo.local_start():
                 status = "未开始"
                 
             todo_tree.insert("", tk.END, values=(todo.title, time_str, status))
@@ -1307,7 +3623,7 @@ class ClockApp:
         has_timer = len(self.timers) > 0
         has_alarm = len(self.alarms) > 0
         has_countdown = len(self.countdowns) > 0
-        has_stopwatch = self.stopwatch.running
+        has_stopwatch = self.stopwatch.running or bool(self.stopwatches.running)
         has_todo = any(not todo.completed for todo in self.todos)  # 检查是否有未完成的待办事项
 
         status_text = f"倒计时: {'有' if has_timer else '无'}\n"
@@ -1341,9 +3657,11 @@ class ClockApp:
             "alarms": [alarm.to_dict() for alarm in self.alarms],
             "countdowns": [countdown.to_dict() for countdown in self.countdowns],
             "stopwatch": self.stopwatch.to_dict(),
+            "stopwatches": self.stopwatches.to_list(),
             "todos": [todo.to_dict() for todo in self.todos],
             "current_month": self.current_month,
-            "current_year": self.current_year
+            "current_year": self.current_year,
+            "saved_at": int(time.time())
         }
         
         try:
@@ -1380,9 +3698,7 @@ class ClockApp:
                 # 加载秒表
                 if "stopwatch" in history_data:
                     self.stopwatch = Stopwatch.from_dict(history_data["stopwatch"])
-                    # 调整开始时间
-                    if self.stopwatch.running:
-                        self.stopwatch.start_time = time.time() - self.stopwatch.elapsed_time
+                self.stopwatches = StopwatchStore.from_list(history_data.get("stopwatches", []))
                 
                 # 加载待办事项
                 self.todos = []
@@ -1390,6 +3706,8 @@ class ClockApp:
                     todo = TodoItem.from_dict(todo_data)
                     self.todos.append(todo)
                 
+                self.history_saved_at = history_data.get("saved_at")
+                
                 # 加载日历状态
                 self.current_month = history_data.get("current_month", datetime.now().month)
                 self.current_year = history_data.get("current_year", datetime.now().year)
@@ -1398,185 +3716,230 @@ class ClockApp:
                 print(f"加载历史记录失败: {e}")
 
     def show_history_window(self):
-        """显示历史记录窗口"""
+        """显示历史记录窗口
+
+        各标签页在第一次切换到时才创建, 列表直接使用主界面维护的SortOrder, 分页加载,
+        因此打开窗口的开销与历史记录的数量无关, 切换到页面时显示的总是当前的数据。
+        顶部的筛选栏作用于当前标签页, 语法见HistoryQuery。
+        """
         history_window = tk.Toplevel(self.root)
         history_window.title("历史记录")
         history_window.geometry("700x500")
         
+        # 筛选栏
+        filter_frame = ttk.Frame(history_window)
+        filter_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+        ttk.Label(filter_frame, text="筛选:").pack(side=tk.LEFT)
+        filter_var = tk.StringVar()
+        filter_entry = ttk.Entry(filter_frame, textvariable=filter_var, width=40)
+        filter_entry.pack(side=tk.LEFT, padx=5)
+        count_label = ttk.Label(filter_frame, text="")
+        
         # 创建标签页
         notebook = ttk.Notebook(history_window)
         notebook.pack(fill='both', expand=True, padx=10, pady=10)
         
-        # 倒计时历史
-        timer_frame = ttk.Frame(notebook)
-        notebook.add(timer_frame, text="倒计时")
-        
-        # 添加隐藏索引列
-        columns = ('index', 'name', 'time', 'status')
-        timer_tree = ttk.Treeview(timer_frame, columns=columns, show='headings')
-        timer_tree.column('index', width=0, stretch=False)  # 隐藏索引列
-        timer_tree.heading('name', text='名称')
-        timer_tree.heading('time', text='剩余时间')
-        timer_tree.heading('status', text='状态')
-        timer_tree.pack(fill='both', expand=True, side=tk.LEFT)
-        
-        # 填充数据时记录索引
-        for index, timer in enumerate(self.timers):
-            remaining = timer.remaining_time().total_seconds()
-            if remaining <= 0:
-                status = "已结束"
-                time_str = "00:00"
-            else:
-                status = "进行中"
-                mins, secs = divmod(int(remaining), 60)
-                time_str = f"{mins:02d}:{secs:02d}"
-            timer_tree.insert("", tk.END, values=(index, timer.name, time_str, status))
-        
-        # 闹钟历史
-        alarm_frame = ttk.Frame(notebook)
-        notebook.add(alarm_frame, text="闹钟")
-        
-        columns = ('index', 'name', 'time', 'repeat', 'status')
-        alarm_tree = ttk.Treeview(alarm_frame, columns=columns, show='headings')
-        alarm_tree.column('index', width=0, stretch=False)
-        alarm_tree.heading('name', text='名称')
-        alarm_tree.heading('time', text='闹钟时间')
-        alarm_tree.heading('repeat', text='重复')
-        alarm_tree.heading('status', text='状态')
-        alarm_tree.pack(fill='both', expand=True, side=tk.LEFT)
+        builders = {}  # 页面路径 -> (类型, 创建函数)
+        tabs = {}      # 已创建的页面路径 -> HistoryTab
+        for text, kind, build in (("倒计时", "timer", self.build_timer_history),
+                                  ("闹钟", "alarm", self.build_alarm_history),
+                                  ("倒计日", "countdown", self.build_countdown_history),
+                                  ("秒表", "stopwatch", self.build_stopwatch_history),
+                                  ("待办事项", "todo", self.build_todo_history)):
+            frame = ttk.Frame(notebook)
+            notebook.add(frame, text=text)
+            builders[str(frame)] = (kind, build)
+        
+        def show(name):
+            """按筛选条件重新填充页面的列表"""
+            tab = tabs[name]
+            if tab.tree is None:
+                count_label.config(text="")
+                return
+            try:
+                query = HistoryQuery(filter_var.get())
+            except ValueError as e:
+                messagebox.showerror("筛选条件错误", str(e), parent=history_window)
+                return
+            items = self.query_history(tab, query)
+            tab.loader.reset(items)
+            count_label.config(text=f"共 {len(items)} 项")
+        
+        def resort(name):
+            # 排序可能由主界面改变, 只重新填充当前显示的页面, 其他页面切换到时再填充
+            if notebook.select() == name:
+                show(name)
+        
+        def on_tab_changed(event=None):
+            name = notebook.select()
+            if not name:
+                return
+            if name not in tabs:
+                kind, build = builders[name]
+                tabs[name] = HistoryTab(kind, *build(notebook.nametowidget(name)))
+                if tabs[name].tree is not None:
+                    bind_sort_headings(tabs[name].tree, tabs[name].order, lambda: resort(name))
+            show(name)
         
-        # 填充数据
-        repeat_text = {"once": "不重复", "daily": "每天", "weekend": "仅周末"}
-        for index, alarm in enumerate(self.alarms):
-            status = "开启" if alarm.active else "关闭"
-            time_str = alarm.alarm_time.strftime("%H:%M")
-            alarm_tree.insert("", tk.END, values=(index, alarm.name, time_str, repeat_text[alarm.repeat], status))
-        
-        # 倒计日历史
-        countdown_frame = ttk.Frame(notebook)
-        notebook.add(countdown_frame, text="倒计日")
-        
-        columns = ('index', 'name', 'days', 'date')
-        countdown_tree = ttk.Treeview(countdown_frame, columns=columns, show='headings')
-        countdown_tree.column('index', width=0, stretch=False)
-        countdown_tree.heading('name', text='名称')
-        countdown_tree.heading('days', text='剩余天数')
-        countdown_tree.heading('date', text='目标日期')
-        countdown_tree.pack(fill='both', expand=True, side=tk.LEFT)
+        notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
+        on_tab_changed()
         
-        # 填充数据
-        now = datetime.now().date()
-        for index, countdown in enumerate(self.countdowns):
-            target_date = countdown.target_date.date()
-            delta = (target_date - now).days
-            status = f"剩余 {delta} 天" if delta >=0 else f"已过期 {-delta} 天"
-            countdown_tree.insert("", tk.END, values=(index, countdown.name, status, target_date.strftime("%Y-%m-%d")))
-        
-        # 秒表历史
-        stopwatch_frame = ttk.Frame(notebook)
-        notebook.add(stopwatch_frame, text="秒表")
-        
-        stopwatch_label = tk.Label(stopwatch_frame, text="秒表状态", font=('Helvetica', 24))
+        def clear_filter():
+            filter_var.set("")
+            show(notebook.select())
+        
+        filter_entry.bind("<Return>", lambda e: show(notebook.select()))
+        ttk.Button(filter_frame, text="筛选", command=lambda: show(notebook.select())).pack(side=tk.LEFT, padx=5)
+        ttk.Button(filter_frame, text="清除", command=clear_filter).pack(side=tk.LEFT)
+        count_label.pack(side=tk.LEFT, padx=10)
+        
+        # 控制按钮
+        btn_frame = ttk.Frame(history_window)
+        btn_frame.pack(pady=10)
+        
+        ttk.Button(btn_frame, text="继续选中", command=lambda: self.resume_selected(notebook, tabs)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="删除选中", command=lambda: self.delete_selected_history(notebook, tabs)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="关闭", command=history_window.destroy).pack(side=tk.LEFT, padx=5)
+
+    def query_history(self, tab, query):
+        """返回页面中满足筛选条件的实体, 保持页面当前的排序
+
+        待办事项先用索引缩小范围: 日期条件用TodoIntervalIndex.starting_between
+        在区间索引(树堆)上按开始时间顺序只遍历该范围内的条目, 名称和关键词用全文索引, 状态用按完成状态分组的uid集合(未开始的再用UTC区间索引定位);
+        所有条件再在候选上确认, 候选按缓存的排序键排序。
+        倒计时、闹钟和倒计日的状态随时间和计时变化, 数量也少, 直接逐个检查。
+        """
+        order = tab.order
+        if query.is_empty():
+            return order.view()
+        predicate = query.predicate(datetime.now())
+        candidates = None  # uid集合, None表示没有可用的索引
+        if tab.kind == "todo":
+            if query.after is not None or query.before is not None:
+                lo = naive_seconds(query.after) if query.after else float("-inf")
+                hi = naive_seconds(query.before) if query.before else float("inf")
+                candidates = {todo.uid for todo in self.todo_intervals.starting_between(lo, hi)}
+            terms = [value for _, value in query.names if value] + query.words
+            if terms:
+                matches = self.todo_search.search(" ".join(terms))
+                candidates = matches if candidates is None else candidates & matches
+            if query.status is not None:
+                matches = self.todo_status_candidates(query.status)
+                candidates = matches if candidates is None else candidates & matches
+        if candidates is None:
+            return [entity for entity in order.display() if predicate(entity)]
+        return [entity for entity in order.ordered(candidates) if predicate(entity)]
+
+    def todo_status_candidates(self, status):
+        """可能处于该状态的待办uid; 未开始和进行中取决于当前时间, 由筛选条件再确认"""
+        if status == "done":
+            return self.completed_todos
+        if status == "pending":
+            upcoming = self.todo_utc_intervals.starting_between(int(time.time()), float("inf"))
+            return {todo.uid for todo in upcoming}
+        if status == "active":
+            return self.open_todos
+        return set()
+
+    def create_history_tree(self, frame, headings, order, row_values):
+        """创建历史记录页的列表和分页加载器, 数据由show_history_window按筛选条件填充"""
+        columns = tuple(column for column, _ in headings)
+        tree = ttk.Treeview(frame, columns=columns, show='headings')
+        for column, text in headings:
+            tree.heading(column, text=text)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill='both', expand=True, side=tk.LEFT)
+        return tree, order, PagedTreeLoader(tree, row_values, scrollbar)
+
+    # 历史记录页与主界面共用同一个SortOrder, 增删改时已经维护, 不需要另外排序
+    def build_timer_history(self, frame):
+        return self.create_history_tree(
+            frame, (('name', '名称'), ('time', '剩余时间'), ('status', '状态')),
+            self.timer_order, self.timer_row_values)
+
+    def build_alarm_history(self, frame):
+        return self.create_history_tree(
+            frame, (('name', '名称'), ('time', '闹钟时间'), ('repeat', '重复'), ('status', '状态')),
+            self.alarm_order, self.alarm_row_values)
+
+    def build_countdown_history(self, frame):
+        today = datetime.now().date()
+        return self.create_history_tree(
+            frame, (('name', '名称'), ('days', '剩余天数'), ('date', '目标日期')),
+            self.countdown_order, lambda countdown: self.countdown_row_values(countdown, today))
+
+    def build_stopwatch_history(self, frame):
+        stopwatch_label = tk.Label(frame, text="秒表状态", font=('Helvetica', 24))
         stopwatch_label.pack(pady=20)
         
-        stopwatch_time_label = tk.Label(stopwatch_frame, text="00:00.00", font=('Helvetica', 36))
+        stopwatch_time_label = tk.Label(frame, text="00:00.00", font=('Helvetica', 36))
         stopwatch_time_label.pack(pady=10)
         
-        def update_stopwatch_display():
-            minutes, seconds = divmod(int(self.stopwatch.elapsed_time), 60)
-            milliseconds = int((self.stopwatch.elapsed_time - int(self.stopwatch.elapsed_time)) * 100)
-            stopwatch_time_label.config(text=f"{minutes:02d}:{seconds:02d}.{milliseconds:02d}")
+        def update_stopwatch_display(snapshot):
+            self.set_stopwatch_text(stopwatch_time_label, snapshot)
             if self.stopwatch.running:
                 stopwatch_label.config(text="秒表状态: 运行中")
-                stopwatch_frame.after(10, update_stopwatch_display)
             else:
                 stopwatch_label.config(text="秒表状态: 已暂停")
         
-        update_stopwatch_display()
-        
-        # 待办事项历史
-        todo_frame = ttk.Frame(notebook)
-        notebook.add(todo_frame, text="待办事项")
-        
-        columns = ('index', 'title', 'start', 'end', 'status')
-        todo_tree = ttk.Treeview(todo_frame, columns=columns, show='headings')
-        todo_tree.column('index', width=0, stretch=False)
-        todo_tree.heading('title', text='标题')
-        todo_tree.heading('start', text='开始时间')
-        todo_tree.heading('end', text='结束时间')
-        todo_tree.heading('status', text='状态')
-        todo_tree.pack(fill='both', expand=True, side=tk.LEFT)
-        
-        # 填充数据
-        for index, todo in enumerate(self.todos):
-            start_str = todo.start_time.strftime("%Y-%m-%d %H:%M") if todo.start_time else "无"
-            end_str = todo.end_time.strftime("%Y-%m-%d %H:%M") if todo.end_time else "无"
-            status = "已完成" if todo.completed else "进行中"
-            if todo.start_time and datetime.now() < todo.start_time:
-                status = "未开始"
-            todo_tree.insert("", tk.END, values=(index, todo.title, start_str, end_str, status))
-        
-        # 控制按钮
-        btn_frame = ttk.Frame(history_window)
-        btn_frame.pack(pady=10)
-        
-        ttk.Button(btn_frame, text="继续选中", command=lambda: self.resume_selected(notebook)).pack(side=tk.LEFT, padx=5)
-        ttk.Button(btn_frame, text="删除选中", command=lambda: self.delete_selected_history(notebook)).pack(side=tk.LEFT, padx=5)
-        ttk.Button(btn_frame, text="关闭", command=history_window.destroy).pack(side=tk.LEFT, padx=5)
+        # 切换到这一页时才开始刷新
+        self.register_stopwatch_view(update_stopwatch_display, frame)
+        return None, None, None
+
+    def build_todo_history(self, frame):
+        now = datetime.now()
+        return self.create_history_tree(
+            frame, (('title', '标题'), ('start', '开始时间'), ('end', '结束时间'), ('status', '状态')),
+            self.todo_order, lambda todo: self.format_todo_row(todo, now)[0])
 
-    def resume_selected(self, notebook):
+    def selected_history_items(self, tab):
+        """返回历史记录页中选中的实体(列表的iid为实体uid)"""
+        by_uid = tab.order.entities
+        return [by_uid[int(iid)] for iid in tab.tree.selection() if int(iid) in by_uid]
+
+    def resume_selected(self, notebook, tabs):
         """继续选中的历史记录项"""
-        current_tab = notebook.index(notebook.select())
-        tree = notebook.nametowidget(notebook.select()).winfo_children()[0]
-        selection = tree.selection()
-        
-        if not selection:
+        tab = tabs.get(notebook.select())
+        if tab is None:
             return
-        
-        selected_item = selection[0]
-        index = int(tree.item(selected_item, 'values')[0])  # 获取隐藏的索引
-        
-        if current_tab == 0:  # 倒计时
-            if 0 <= index < len(self.timers):
-                self.timers[index].running = True
-                self.update_timer_list()
-        elif current_tab == 1:  # 闹钟
-            if 0 <= index < len(self.alarms):
-                self.alarms[index].active = True
-                self.update_alarm_list()
-        elif current_tab == 3:  # 秒表
+        if tab.kind == "stopwatch":
             self.start_stopwatch()
-        elif current_tab == 4:  # 待办事项
-            if 0 <= index < len(self.todos):
-                self.todos[index].completed = False
-                self.update_todo_list()
+            return
+        
+        for entity in self.selected_history_items(tab):
+            if tab.kind == "timer":
+                self.resume_timer(entity)
+            elif tab.kind == "alarm":
+                entity.active = True
+                entity.schedule(int(time.time()))
+                self.update_alarm_row(entity)
+            elif tab.kind == "todo":
+                self.edit_todo_item(entity, completed=False)
+            else:
+                continue
+            tab.loader.refresh(entity)
+        if tab.kind == "todo":
+            self.update_todo_list()
 
-    def delete_selected_history(self, notebook):
+    def delete_selected_history(self, notebook, tabs):
         """删除选中的历史记录项"""
-        current_tab = notebook.index(notebook.select())
-        tree = notebook.nametowidget(notebook.select()).winfo_children()[0]
-        selection = tree.selection()
-        
-        if not selection:
+        tab = tabs.get(notebook.select())
+        if tab is None or tab.kind == "stopwatch":
             return
         
-        selected_item = selection[0]
-        index = int(tree.item(selected_item, 'values')[0])
-        
-        if current_tab == 0:  # 倒计时
-            if 0 <= index < len(self.timers):
-                del self.timers[index]
-        elif current_tab == 1:  # 闹钟
-            if 0 <= index < len(self.alarms):
-                del self.alarms[index]
-        elif current_tab == 2:  # 倒计日
-            if 0 <= index < len(self.countdowns):
-                del self.countdowns[index]
-        elif current_tab == 4:  # 待办事项
-            if 0 <= index < len(self.todos):
-                del self.todos[index]
-        
-        tree.delete(selected_item)  # 刷新显示
+        for entity in self.selected_history_items(tab):
+            if tab.kind == "timer":
+                self.remove_timer(entity)
+            elif tab.kind == "alarm":
+                self.remove_alarm(entity)
+            elif tab.kind == "countdown":
+                self.remove_countdown(entity)
+            elif tab.kind == "todo":
+                self.remove_todo_item(entity)
+            tab.loader.remove(entity)  # 刷新显示
+        if tab.kind == "todo":
+            self.update_todo_list()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,69 @@
+"""日历翻页延迟基准测试
+
+用法: python bench_calendar.py [待办数量] [翻页次数]
+
+需要图形界面环境。程序在临时目录中运行, 不会读写真实的历史记录。
+先向后翻页一半次数再翻回来, 统计每次翻页(含布局刷新)的耗时,
+并检查翻页前后日历中的控件数量是否变化。
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tkinter as tk
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import Main
+
+
+def create_todos(app, count):
+    rnd = random.Random(0)
+    base = datetime.now() - timedelta(days=365)
+    for i in range(count):
+        start = base + timedelta(minutes=rnd.randrange(2 * 365 * 24 * 60))
+        end = start + timedelta(minutes=rnd.randrange(30, 3 * 24 * 60))
+        todo = Main.TodoItem(f"待办{i}", "", start, end)
+        # 避免基准测试过程中弹出提醒
+        todo.notified_start = todo.notified_end = True
+        app.add_todo_item(todo)
+
+
+def main():
+    todo_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+
+    os.chdir(tempfile.mkdtemp())
+    root = tk.Tk()
+    root.withdraw()
+    app = Main.ClockApp(root)
+    create_todos(app, todo_count)
+
+    app.show_calendar()
+    window = app.calendar_frame.winfo_toplevel()
+    root.update()
+    widgets_before = len(app.calendar_frame.winfo_children())
+
+    samples = []
+    for step in range(steps):
+        delta = 1 if step < steps // 2 else -1
+        started = time.perf_counter()
+        app.change_calendar_month(delta, window)
+        root.update_idletasks()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    widgets_after = len(app.calendar_frame.winfo_children())
+    samples.sort()
+    print(f"待办数量: {todo_count}, 翻页次数: {steps}")
+    print(f"平均: {statistics.mean(samples):.3f} ms")
+    print(f"中位数: {statistics.median(samples):.3f} ms")
+    print(f"P95: {samples[int(len(samples) * 0.95) - 1]:.3f} ms")
+    print(f"最大: {samples[-1]:.3f} ms")
+    print(f"日历控件数: 翻页前 {widgets_before}, 翻页后 {widgets_after}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
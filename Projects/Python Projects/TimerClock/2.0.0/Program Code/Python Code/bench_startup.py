@@ -0,0 +1,94 @@
+"""启动时间基准测试
+
+用法: python bench_startup.py [启动次数]
+
+需要图形界面环境。程序在临时目录中运行, 不会读写真实的历史记录。
+1. 用 python -X importtime 导入Main, 列出累计耗时最多的模块;
+2. 在新进程中多次启动程序, 统计从启动进程到主时钟第一次绘制完成的时间。
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TARGET_MS = 200
+
+# 在子进程中运行: 记录各阶段的时刻(time.time(), 可与父进程比较), 主时钟显示后退出
+CHILD = r"""
+import json, sys, time
+started = time.time()
+sys.path.insert(0, sys.argv[1])
+import tkinter as tk
+import Main
+imported = time.time()
+root = tk.Tk()
+app = Main.ClockApp(root)
+built = time.time()
+while not (app.main_clock_label.winfo_ismapped() and app.main_clock_label.cget("text")):
+    root.update()
+root.update_idletasks()
+painted = time.time()
+lazy = [name for name in ("zoneinfo", "calendar", "numpy") if name in sys.modules]
+root.destroy()
+print(json.dumps({"started": started, "imported": imported, "built": built,
+                  "painted": painted, "lazy": lazy}))
+"""
+
+
+def import_breakdown(count=15):
+    """返回 -X importtime 中累计耗时最多的模块 [(累计微秒, 自身微秒, 模块名)]"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import Main"],
+                            cwd=HERE, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:count]
+
+
+def run_once(work_dir):
+    launched = time.time()
+    output = subprocess.run([sys.executable, "-c", CHILD, HERE], cwd=work_dir,
+                            stdout=subprocess.PIPE, check=True, text=True).stdout
+    marks = json.loads(output.strip().splitlines()[-1])
+    return {
+        "解释器启动": (marks["started"] - launched) * 1000,
+        "导入Main": (marks["imported"] - marks["started"]) * 1000,
+        "创建界面": (marks["built"] - marks["imported"]) * 1000,
+        "首次绘制": (marks["painted"] - marks["built"]) * 1000,
+        "总计": (marks["painted"] - launched) * 1000,
+    }, marks["lazy"]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("导入耗时 (-X importtime, 累计最多的模块):")
+    print(f"{'累计(ms)':>10} {'自身(ms)':>10}  模块")
+    for cumulative_us, self_us, name in import_breakdown():
+        print(f"{cumulative_us / 1000:10.2f} {self_us / 1000:10.2f}  {name}")
+
+    work_dir = tempfile.mkdtemp()
+    samples = []
+    lazy = []
+    for _ in range(runs):
+        phases, lazy = run_once(work_dir)
+        samples.append(phases)
+
+    print(f"\n启动到主时钟首次绘制 (中位数, {runs} 次):")
+    for phase in samples[0]:
+        print(f"  {phase}: {statistics.median(sample[phase] for sample in samples):.1f} ms")
+    total = statistics.median(sample["总计"] for sample in samples)
+    print(f"目标: < {TARGET_MS} ms, {'达到' if total < TARGET_MS else '未达到'}")
+    print(f"启动时已导入的延迟模块: {', '.join(lazy) or '无'}")
+
+
+if __name__ == "__main__":
+    main()
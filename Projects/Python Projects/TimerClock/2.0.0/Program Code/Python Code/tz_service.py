@@ -0,0 +1,139 @@
+"""时区服务
+
+基于标准库zoneinfo, 不依赖第三方库(Windows上没有系统时区数据库, 需要安装tzdata包)。
+每个时区第一次使用时预先计算一段时间内的UTC偏移量切换表, 之后UTC时间与当地时间的换算
+只需查表; 超出表的范围时直接用zoneinfo计算。
+
+时间统一用整数秒表示: UTC时间为Unix时间戳, 当地时间为当地时钟读数距1970-01-01 00:00的秒数。
+当地时间落在夏令时切换造成的空档里时向后顺延空档的长度, 重复时取第一次出现(fold=0)。
+"""
+import bisect
+import time
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1)
+DAY = 86400
+TABLE_BEFORE = 366 * DAY      # 切换表覆盖当前时间之前一年
+TABLE_AFTER = 10 * 366 * DAY  # 和之后十年
+
+_zones = {}
+_all_zones = None
+
+
+class UnknownTimeZoneError(KeyError):
+    """时区名无效, 或本机没有时区数据"""
+
+
+def find_offset_change(offset_at, start, end, step=DAY):
+    """查找UTC偏移量在(start, end]内第一次变化的时刻(整数秒), 没有变化时返回None
+
+    按step前进找到偏移量变化的区间, 再在区间内二分查找到秒。
+    假设一个step内最多只有一次切换, 夏令时切换之间至少相隔数周。
+    """
+    offset = offset_at(start)
+    lo = start
+    while lo < end:
+        hi = min(lo + step, end)
+        if offset_at(hi) != offset:
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if offset_at(mid) == offset:
+                    lo = mid
+                else:
+                    hi = mid
+            return hi
+        lo = hi
+    return None
+
+
+class ZoneTable:
+    """一个时区的UTC偏移量切换表
+
+    starts[i]起(UTC时间戳)偏移量为offsets[i], 直到starts[i + 1]。
+    最近一次查到的区间会被记住, 同一区间内的连续查询不需要二分查找。
+    """
+    def __init__(self, name, tzinfo, now=None):
+        self.name = name
+        self.tzinfo = tzinfo
+        now = int(time.time() if now is None else now)
+        self.table_start = now - TABLE_BEFORE
+        self.table_end = now + TABLE_AFTER
+        self.starts = [self.table_start]
+        self.offsets = [self._zone_offset(self.table_start)]
+        ts = self.table_start
+        while True:
+            ts = find_offset_change(self._zone_offset, ts, self.table_end)
+            if ts is None:
+                break
+            self.starts.append(ts)
+            self.offsets.append(self._zone_offset(ts))
+        self._lo = self._hi = 0  # 上次查到的区间[_lo, _hi)
+        self._offset = 0
+
+    def _zone_offset(self, ts):
+        return int(datetime.fromtimestamp(ts, self.tzinfo).utcoffset().total_seconds())
+
+    def utc_offset(self, ts):
+        """UTC时间戳ts时的UTC偏移量(秒)"""
+        if self._lo <= ts < self._hi:
+            return self._offset
+        if not self.table_start <= ts < self.table_end:
+            return self._zone_offset(ts)
+        i = bisect.bisect_right(self.starts, ts) - 1
+        self._lo = self.starts[i]
+        self._hi = self.starts[i + 1] if i + 1 < len(self.starts) else self.table_end
+        self._offset = self.offsets[i]
+        return self._offset
+
+    def next_transition(self, ts):
+        """ts之后下一次切换的UTC时间戳; 表内没有时返回None"""
+        i = bisect.bisect_right(self.starts, ts)
+        return self.starts[i] if i < len(self.starts) else None
+
+    def to_local(self, ts):
+        """UTC时间戳对应的当地时间(不带时区信息的datetime)"""
+        return EPOCH + timedelta(seconds=ts + self.utc_offset(ts))
+
+    def local_to_utc(self, local_seconds):
+        """当地时间(距1970-01-01 00:00的秒数)对应的UTC时间戳
+
+        当地时间在前后一天内最多经历一次切换, 只需检查这两个偏移量:
+        两个都成立时是重复的时间, 取较早的一个; 都不成立时是空档, 按切换前的偏移量计算,
+        结果落在切换之后, 相当于向后顺延空档的长度。
+        """
+        before = self.utc_offset(local_seconds - DAY)
+        after = self.utc_offset(local_seconds + DAY)
+        candidates = sorted({local_seconds - before, local_seconds - after})
+        for ts in candidates:
+            if ts + self.utc_offset(ts) == local_seconds:
+                return ts
+        return local_seconds - before
+
+    def localize(self, local):
+        """不带时区信息的当地时间对应的UTC时间戳"""
+        return self.local_to_utc((local - EPOCH) // timedelta(seconds=1))
+
+
+def get_zone(name):
+    """返回时区的切换表, 第一次使用某个时区时计算; 时区无效时抛出UnknownTimeZoneError"""
+    zone = _zones.get(name)
+    if zone is None:
+        if name == "UTC":
+            tzinfo = timezone.utc
+        else:
+            from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+            try:
+                tzinfo = ZoneInfo(name)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise UnknownTimeZoneError(name)
+        zone = _zones[name] = ZoneTable(name, tzinfo)
+    return zone
+
+
+def all_zones():
+    """时区数据库中的全部时区名, 已排序"""
+    global _all_zones
+    if _all_zones is None:
+        from zoneinfo import available_timezones
+        _all_zones = sorted(available_timezones() | {"UTC"})
+    return _all_zones